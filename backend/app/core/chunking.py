@@ -3,9 +3,12 @@ Code chunking utilities for processing source files.
 """
 
 import os
-import hashlib
-from typing import List, Optional
+import codecs
+import functools
+from typing import Iterator, List, Optional
 from dataclasses import dataclass
+import blake3
+import numpy as np
 import tiktoken
 
 # File extensions to process
@@ -17,19 +20,85 @@ TEXT_EXTENSIONS = {
 }
 
 # Files to skip
-SKIP_PATTERNS = {
+SKIP_PATTERNS = frozenset({
     '.git', '.svn', '.hg', '__pycache__', '.pytest_cache', 'node_modules',
     '.venv', 'venv', '.env', 'dist', 'build', '.next', '.nuxt',
     'coverage', '.coverage', '.nyc_output', 'target', 'bin', 'obj'
+})
+
+# Programming language for each supported file extension
+EXTENSION_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.jsx': 'javascript',
+    '.java': 'java',
+    '.kt': 'kotlin',
+    '.go': 'go',
+    '.rb': 'ruby',
+    '.rs': 'rust',
+    '.php': 'php',
+    '.cs': 'csharp',
+    '.c': 'c',
+    '.h': 'c',
+    '.hpp': 'cpp',
+    '.cc': 'cpp',
+    '.cpp': 'cpp',
+    '.m': 'objective-c',
+    '.mm': 'objective-c',
+    '.swift': 'swift',
+    '.sh': 'bash',
+    '.bash': 'bash',
+    '.zsh': 'zsh',
+    '.json': 'json',
+    '.yml': 'yaml',
+    '.yaml': 'yaml',
+    '.toml': 'toml',
+    '.ini': 'ini',
+    '.cfg': 'ini',
+    '.env': 'bash',
+    '.md': 'markdown',
+    '.rst': 'rst',
+    '.txt': 'text',
+    '.html': 'html',
+    '.css': 'css',
+    '.scss': 'scss',
+    '.sql': 'sql'
 }
 
+# Extensions of compiled, archive and media files that are never indexed
+SKIP_EXTENSIONS = frozenset({
+    '.exe', '.dll', '.so', '.dylib', '.o', '.a', '.obj', '.class', '.jar', '.pyc', '.pyo',
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.pdf',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.tar', '.7z', '.whl'
+})
+
 # Maximum file size (1MB)
 MAX_FILE_SIZE = 1024 * 1024
 
+# Leading magic bytes of common binary formats (PNG, JPEG, GIF, PDF, ZIP, ELF).
+# Windows executables are excluded by extension: their 'MZ' prefix also starts plain text.
+BINARY_SIGNATURES = (
+    b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'%PDF', b'PK\x03\x04', b'\x7fELF'
+)
 
-@dataclass
+# Bytes inspected when sniffing files with unknown extensions
+TEXT_SNIFF_SIZE = 4096
+
+
+def _content_hash(content: str) -> str:
+    """Hex digest identifying chunk content (BLAKE3)."""
+    return blake3.blake3(content.encode()).hexdigest()
+
+
+@dataclass(slots=True)
 class CodeChunk:
-    """Represents a chunk of code with metadata."""
+    """Represents a chunk of code with metadata.
+    
+    Stored in slots rather than a per-instance ``__dict__``; large indexes
+    keep hundreds of thousands of these in memory.
+    """
     path: str
     content: str
     start_line: int
@@ -39,7 +108,56 @@ class CodeChunk:
     
     def __post_init__(self):
         if not self.content_hash:
-            self.content_hash = hashlib.md5(self.content.encode()).hexdigest()
+            self.content_hash = _content_hash(self.content)
+    
+    def __setstate__(self, state):
+        # Chunks pickled before slots were added carry a plain dict state
+        if isinstance(state, tuple):
+            state = state[1]
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+
+@dataclass
+class ChunkBatch:
+    """Column-wise view of a list of chunks for batched embedding.
+    
+    ``contents`` can be passed straight to the embedding model while line
+    ranges sit in contiguous int32 arrays.
+    """
+    paths: List[str]
+    contents: List[str]
+    start_lines: np.ndarray
+    end_lines: np.ndarray
+    content_hashes: List[str]
+    languages: List[Optional[str]]
+    
+    @classmethod
+    def from_chunks(cls, chunks: List[CodeChunk]) -> "ChunkBatch":
+        """Build a batch from chunk records."""
+        return cls(
+            paths=[chunk.path for chunk in chunks],
+            contents=[chunk.content for chunk in chunks],
+            start_lines=np.fromiter((chunk.start_line for chunk in chunks), dtype=np.int32, count=len(chunks)),
+            end_lines=np.fromiter((chunk.end_line for chunk in chunks), dtype=np.int32, count=len(chunks)),
+            content_hashes=[chunk.content_hash for chunk in chunks],
+            languages=[chunk.language for chunk in chunks]
+        )
+    
+    def __len__(self) -> int:
+        return len(self.contents)
+    
+    def iter_chunks(self) -> Iterator[CodeChunk]:
+        """Yield the batch back as CodeChunk records."""
+        for i in range(len(self.contents)):
+            yield CodeChunk(
+                path=self.paths[i],
+                content=self.contents[i],
+                start_line=int(self.start_lines[i]),
+                end_line=int(self.end_lines[i]),
+                content_hash=self.content_hashes[i],
+                language=self.languages[i]
+            )
 
 
 def should_skip_file(file_path: str, file_size: int) -> bool:
@@ -48,8 +166,14 @@ def should_skip_file(file_path: str, file_size: int) -> bool:
     if file_size > MAX_FILE_SIZE:
         return True
     
+    path = file_path.lower()
+    
+    # Check extension with a single set lookup
+    if os.path.splitext(path)[1] in SKIP_EXTENSIONS:
+        return True
+    
     # Check if path contains skip patterns
-    path_parts = file_path.lower().split(os.sep)
+    path_parts = path.split(os.sep)
     for part in path_parts:
         if part in SKIP_PATTERNS:
             return True
@@ -59,6 +183,13 @@ def should_skip_file(file_path: str, file_size: int) -> bool:
     return False
 
 
+def should_skip_dir(dir_name: str) -> bool:
+    """Check if a directory can be pruned without looking at its contents."""
+    # Mirrors the path component checks in should_skip_file
+    name = dir_name.lower()
+    return name in SKIP_PATTERNS or (name.startswith('.') and len(name) > 1)
+
+
 def is_text_file(file_path: str, content_bytes: bytes) -> bool:
     """Check if a file is likely to be a text file."""
     # Check extension
@@ -66,13 +197,19 @@ def is_text_file(file_path: str, content_bytes: bytes) -> bool:
     if ext in TEXT_EXTENSIONS:
         return True
     
+    # Known binary formats are recognised from their first bytes
+    if content_bytes.startswith(BINARY_SIGNATURES):
+        return False
+    
     # Check for binary content
-    if b'\x00' in content_bytes[:1024]:  # Check first 1KB for null bytes
+    sample = content_bytes[:TEXT_SNIFF_SIZE]
+    if b'\x00' in sample[:1024]:  # Check first 1KB for null bytes
         return False
     
-    # Check if mostly ASCII
+    # Check the sample is valid UTF-8; the caller decodes the full file anyway.
+    # Decode incrementally so a multi-byte character cut at the sample end is not an error.
     try:
-        content_bytes.decode('utf-8')
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
         return True
     except UnicodeDecodeError:
         return False
@@ -81,48 +218,21 @@ def is_text_file(file_path: str, content_bytes: bytes) -> bool:
 def get_language_from_extension(file_path: str) -> Optional[str]:
     """Get programming language from file extension."""
     ext = os.path.splitext(file_path)[1].lower()
-    
-    language_map = {
-        '.py': 'python',
-        '.js': 'javascript',
-        '.ts': 'typescript',
-        '.tsx': 'typescript',
-        '.jsx': 'javascript',
-        '.java': 'java',
-        '.kt': 'kotlin',
-        '.go': 'go',
-        '.rb': 'ruby',
-        '.rs': 'rust',
-        '.php': 'php',
-        '.cs': 'csharp',
-        '.c': 'c',
-        '.h': 'c',
-        '.hpp': 'cpp',
-        '.cc': 'cpp',
-        '.cpp': 'cpp',
-        '.m': 'objective-c',
-        '.mm': 'objective-c',
-        '.swift': 'swift',
-        '.sh': 'bash',
-        '.bash': 'bash',
-        '.zsh': 'zsh',
-        '.json': 'json',
-        '.yml': 'yaml',
-        '.yaml': 'yaml',
-        '.toml': 'toml',
-        '.ini': 'ini',
-        '.cfg': 'ini',
-        '.env': 'bash',
-        '.md': 'markdown',
-        '.rst': 'rst',
-        '.txt': 'text',
-        '.html': 'html',
-        '.css': 'css',
-        '.scss': 'scss',
-        '.sql': 'sql'
-    }
-    
-    return language_map.get(ext)
+    return EXTENSION_LANGUAGES.get(ext)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tokenizer once per process, or None to fall back to characters."""
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def chunk_file_batched(file_path: str, content: str, max_chunk_size: int = 1000) -> ChunkBatch:
+    """Chunk a file and return the chunks as a column-wise batch."""
+    return ChunkBatch.from_chunks(chunk_file(file_path, content, max_chunk_size))
 
 
 def chunk_file(file_path: str, content: str, max_chunk_size: int = 1000) -> List[CodeChunk]:
@@ -136,20 +246,20 @@ def chunk_file(file_path: str, content: str, max_chunk_size: int = 1000) -> List
     # Get language for syntax-aware chunking
     language = get_language_from_extension(file_path)
     
-    # Use tiktoken for token counting
-    try:
-        encoding = tiktoken.get_encoding("cl100k_base")
-    except Exception:
-        # Fallback to character-based chunking
-        encoding = None
+    # Use tiktoken for token counting, falling back to character-based chunking.
+    # encode_ordinary skips the per-call special-token regex scan that encode runs.
+    encoding = _get_encoding()
+    if encoding:
+        encode = encoding.encode_ordinary
+        line_sizes = [len(encode(line)) if line else 0 for line in lines]
+    else:
+        line_sizes = [len(line) for line in lines]
     
     current_chunk = []
     current_size = 0
     start_line = 1
     
-    for i, line in enumerate(lines, 1):
-        line_size = len(encoding.encode(line)) if encoding else len(line)
-        
+    for i, (line, line_size) in enumerate(zip(lines, line_sizes), 1):
         # If adding this line would exceed max size, create a chunk
         if current_chunk and current_size + line_size > max_chunk_size:
             chunk_content = '\n'.join(current_chunk)
@@ -184,4 +294,4 @@ def chunk_file(file_path: str, content: str, max_chunk_size: int = 1000) -> List
                 language=language
             ))
     
-    return chunks
\ No newline at end of file
+    return chunks
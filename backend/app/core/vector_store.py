@@ -7,7 +7,7 @@ import pickle
 import numpy as np
 import faiss
 import structlog
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from pathlib import Path
 
 from .config import settings
@@ -79,16 +79,18 @@ class VectorStore:
             logger.error(f"Failed to save vector store for {self.repo_id}: {e}")
             raise
     
-    def add_chunks(self, chunks: List[CodeChunk], embeddings: List[List[float]]) -> int:
+    def add_chunks(self, chunks: List[CodeChunk], embeddings: Union[List[List[float]], np.ndarray]) -> int:
         """Add chunks with their embeddings to the store."""
-        if not chunks or not embeddings:
+        if not chunks or len(embeddings) == 0:
             return 0
         
         if len(chunks) != len(embeddings):
             raise ValueError("Number of chunks must match number of embeddings")
         
-        # Convert embeddings to numpy array
-        embeddings_array = np.array(embeddings, dtype=np.float32)
+        # Convert embeddings to a C-contiguous float32 matrix. A prebuilt
+        # (n, dim) float32 ndarray is copied with a single memcpy; the copy
+        # keeps normalize_L2 from modifying the caller's array in place.
+        embeddings_array = np.array(embeddings, dtype=np.float32, order='C')
         
         # Normalize for cosine similarity
         faiss.normalize_L2(embeddings_array)
@@ -111,13 +113,13 @@ class VectorStore:
         logger.info(f"Added {len(chunks)} chunks to {self.repo_id}")
         return len(chunks)
     
-    def search(self, query_embedding: List[float], k: int = 5) -> List[Dict[str, Any]]:
+    def search(self, query_embedding: Union[List[float], np.ndarray], k: int = 5) -> List[Dict[str, Any]]:
         """Search for similar chunks."""
         if self.index.ntotal == 0:
             return []
         
-        # Convert to numpy array and normalize
-        query_array = np.array([query_embedding], dtype=np.float32)
+        # Convert to a (1, dim) float32 copy and normalize
+        query_array = np.array(query_embedding, dtype=np.float32).reshape(1, -1)
         faiss.normalize_L2(query_array)
         
         # Search
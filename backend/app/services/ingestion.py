@@ -2,25 +2,33 @@
 Ingestion service for processing GitHub repositories and ZIP files.
 """
 
+import asyncio
 import os
 import tempfile
 import zipfile
 import shutil
 import time
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 import git
+import numpy as np
 import structlog
 from fastapi import UploadFile
 
 from ..core.config import settings
 from ..core.schemas import IngestRequest, IngestResponse
-from ..core.chunking import chunk_file, should_skip_file, is_text_file
+from ..core.chunking import chunk_file, should_skip_file, should_skip_dir, is_text_file
 from ..core.vector_store import VectorStoreManager
 from .embedding import EmbeddingService
 
 logger = structlog.get_logger()
 
+# Upper bound on embeddings remembered per ingest run for duplicate chunks
+EMBEDDING_CACHE_SIZE = 10000
+
+# Repositories with more files than this are read and chunked on a thread pool
+PARALLEL_CHUNK_MIN_FILES = 50
+
 
 class IngestionService:
     """Service for ingesting repositories and building vector indexes."""
@@ -149,33 +157,79 @@ class IngestionService:
         files_processed = 0
         chunks_stored = 0
         
-        # Process files in batches
+        # Embeddings computed so far this run, keyed by chunk content hash, so
+        # duplicated content (vendored or copy-pasted code) is only embedded once.
+        # Every chunk is still stored with its own path and line range.
+        embedding_cache: Dict[str, np.ndarray] = {}
+        
         batch_size = 10  # Process 10 files at a time
-        for i in range(0, len(all_files), batch_size):
-            batch_files = all_files[i:i + batch_size]
-            
-            batch_chunks = []
-            batch_texts = []
-            
-            for file_path in batch_files:
-                try:
-                    file_chunks = await self._process_single_file(file_path, root_path)
+        
+        # File reads and tokenization release the GIL, so larger repositories
+        # chunk several files at once; small ones skip the thread start-up cost.
+        # At most one batch is in flight, so more workers than that would idle.
+        executor = None
+        if len(all_files) > PARALLEL_CHUNK_MIN_FILES:
+            executor = ThreadPoolExecutor(max_workers=min(batch_size, (os.cpu_count() or 1) * 2))
+        loop = asyncio.get_running_loop()
+        
+        try:
+            # Process files in batches
+            for i in range(0, len(all_files), batch_size):
+                batch_files = all_files[i:i + batch_size]
+                
+                batch_chunks = []
+                
+                if executor:
+                    batch_results = await asyncio.gather(
+                        *(loop.run_in_executor(executor, self._process_single_file, file_path, root_path)
+                          for file_path in batch_files),
+                        return_exceptions=True
+                    )
+                else:
+                    batch_results = []
+                    for file_path in batch_files:
+                        try:
+                            batch_results.append(self._process_single_file(file_path, root_path))
+                        except Exception as e:
+                            batch_results.append(e)
+                
+                for file_path, file_chunks in zip(batch_files, batch_results):
+                    if isinstance(file_chunks, Exception):
+                        logger.warning(f"Failed to process file {file_path}: {file_chunks}")
+                        continue
                     if file_chunks:
                         batch_chunks.extend(file_chunks)
-                        batch_texts.extend([chunk.content for chunk in file_chunks])
                         files_processed += 1
-                        
-                except Exception as e:
-                    logger.warning(f"Failed to process file {file_path}: {e}")
-                    continue
-            
-            # Compute embeddings for batch
-            if batch_chunks:
-                embeddings = await self.embedding_service.embed_texts(batch_texts)
                 
-                # Add to vector store
-                stored_count = vector_store.add_chunks(batch_chunks, embeddings)
-                chunks_stored += stored_count
+                # Compute embeddings for content not seen earlier in this run
+                if batch_chunks:
+                    new_texts = {}
+                    for chunk in batch_chunks:
+                        if chunk.content_hash not in embedding_cache:
+                            new_texts.setdefault(chunk.content_hash, chunk.content)
+                    
+                    fresh = {}
+                    if new_texts:
+                        new_embeddings = await self.embedding_service.embed_texts(list(new_texts.values()))
+                        fresh = dict(zip(new_texts, np.asarray(new_embeddings, dtype=np.float32)))
+                    
+                    embeddings = np.array([
+                        fresh[chunk.content_hash] if chunk.content_hash in fresh else embedding_cache[chunk.content_hash]
+                        for chunk in batch_chunks
+                    ], dtype=np.float32)
+                    
+                    # Remember new embeddings while the cache has room
+                    for content_hash, embedding in fresh.items():
+                        if len(embedding_cache) >= EMBEDDING_CACHE_SIZE:
+                            break
+                        embedding_cache[content_hash] = embedding
+                    
+                    # Add to vector store
+                    stored_count = vector_store.add_chunks(batch_chunks, embeddings)
+                    chunks_stored += stored_count
+        finally:
+            if executor:
+                executor.shutdown()
         
         logger.info(
             f"Ingestion completed for {request.repo_id}",
@@ -206,15 +260,8 @@ class IngestionService:
         exclude_spec = PathSpec.from_lines(GitWildMatchPattern, exclude_globs)
         
         files = []
-        root_path_obj = Path(root_path)
         
-        for file_path in root_path_obj.rglob('*'):
-            if not file_path.is_file():
-                continue
-            
-            # Convert to relative path for pattern matching
-            rel_path = str(file_path.relative_to(root_path))
-            
+        for entry, rel_path in self._scan_files(root_path):
             # Check if file should be included
             if not include_spec.match_file(rel_path):
                 continue
@@ -224,16 +271,37 @@ class IngestionService:
                 continue
             
             # Check file size
-            file_size = file_path.stat().st_size
+            file_size = entry.stat().st_size
             if should_skip_file(rel_path, file_size):
                 continue
             
-            files.append(str(file_path))
+            files.append(entry.path)
         
         logger.info(f"Found {len(files)} files to process")
         return files
     
-    async def _process_single_file(self, file_path: str, root_path: str) -> List:
+    def _scan_files(self, root_path: str):
+        """Yield (DirEntry, relative path) for every file under root_path.
+        
+        Directories rejected by should_skip_dir (.git, node_modules, ...) are
+        pruned before descending, and DirEntry type checks avoid extra stat calls.
+        """
+        pending = [(root_path, "")]
+        while pending:
+            dir_path, rel_dir = pending.pop()
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if not should_skip_dir(entry.name):
+                                pending.append((entry.path, rel_path))
+                        elif entry.is_file():
+                            yield entry, rel_path
+            except OSError as e:
+                logger.warning(f"Failed to scan directory {dir_path}: {e}")
+    
+    def _process_single_file(self, file_path: str, root_path: str) -> List:
         """Process a single file and return chunks."""
         from ..core.chunking import CodeChunk
         
@@ -256,8 +324,12 @@ class IngestionService:
             logger.warning(f"Failed to decode file {file_path} as UTF-8")
             return []
         
-        # Normalize content
-        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        # Drop the raw bytes so only the decoded text stays alive while chunking
+        del content_bytes
+        
+        # Normalize content, skipping the copies when there are no CR characters
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
         
         # Get relative path
         rel_path = os.path.relpath(file_path, root_path)
@@ -3,6 +3,7 @@ RAG (Retrieval-Augmented Generation) service for answering questions about codeb
 """
 
 import asyncio
+import re
 from typing import List, Dict, Any, Optional
 import openai
 import structlog
@@ -12,6 +13,23 @@ from ..core.schemas import Citation
 
 logger = structlog.get_logger()
 
+# Citations written as path:start-end in generated answers
+CITATION_PATTERN = re.compile(r'([^:\s]+):(\d+)-(\d+)')
+
+# Numbered citation markers such as [1] left in generated answers
+CITATION_MARKER_PATTERN = re.compile(r'\[\d+\]')
+
+# System prompt sent with every RAG request
+SYSTEM_PROMPT = """You are a precise codebase assistant. Answer concisely using only the provided snippets. Always include citations with file paths and line ranges. If unsure, say you are not confident.
+
+Guidelines:
+- Explain in 2-5 sentences
+- List citations as: path:start-end
+- If multiple files contribute, describe their roles briefly
+- If answer is uncertain, state what is missing and suggest where to look next
+- Use the exact file paths and line numbers provided in the snippets
+- Do not make up information not present in the provided code"""
+
 
 class RAGService:
     """Service for generating answers using RAG with citations."""
@@ -108,15 +126,7 @@ class RAGService:
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for RAG."""
-        return """You are a precise codebase assistant. Answer concisely using only the provided snippets. Always include citations with file paths and line ranges. If unsure, say you are not confident.
-
-Guidelines:
-- Explain in 2-5 sentences
-- List citations as: path:start-end
-- If multiple files contribute, describe their roles briefly
-- If answer is uncertain, state what is missing and suggest where to look next
-- Use the exact file paths and line numbers provided in the snippets
-- Do not make up information not present in the provided code"""
+        return SYSTEM_PROMPT
     
     def _build_rag_prompt(self, question: str, retrieved_chunks: List[Dict[str, Any]]) -> str:
         """Build the RAG prompt with retrieved chunks."""
@@ -151,9 +161,7 @@ Guidelines:
             chunk_map[content_hash] = chunk
         
         # Look for citation patterns in the answer
-        import re
-        citation_pattern = r'([^:\s]+):(\d+)-(\d+)'
-        matches = re.findall(citation_pattern, answer)
+        matches = CITATION_PATTERN.findall(answer)
         
         for path, start, end in matches:
             # Find the corresponding chunk
@@ -186,8 +194,7 @@ Guidelines:
     def _clean_answer(self, answer: str) -> str:
         """Clean up the answer by removing citation markers."""
         # Remove citation markers like [1], [2], etc.
-        import re
-        cleaned = re.sub(r'\[\d+\]', '', answer)
+        cleaned = CITATION_MARKER_PATTERN.sub('', answer)
         return cleaned.strip()
     
     async def validate_answer(self, answer: str, citations: List[Citation]) -> bool:
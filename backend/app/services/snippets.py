@@ -2,11 +2,14 @@
 Snippet extraction service for retrieving code with surrounding context.
 """
 
+import codecs
+import io
 import os
 from typing import Optional, Tuple
 import structlog
 
 from ..core.config import settings
+from ..core.chunking import TEXT_EXTENSIONS
 
 logger = structlog.get_logger()
 
@@ -49,18 +52,21 @@ def extract_snippet(
             logger.warning(f"File not found: {file_path}")
             return None
         
-        # Read file content
+        # Read raw bytes once so binary files can be rejected before decoding
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        
+        if not _is_probably_text(rel_path, data):
+            logger.warning(f"Skipping binary file: {file_path}")
+            return None
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            text = data.decode('utf-8')
         except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    lines = f.readlines()
-            except Exception as e:
-                logger.warning(f"Failed to read file {file_path}: {e}")
-                return None
+            # Fall back to an encoding that accepts any byte sequence
+            text = data.decode('latin-1')
+        
+        lines = io.StringIO(text, newline=None).readlines()
         
         if not lines:
             return None
@@ -100,6 +106,49 @@ def extract_snippet(
         return None
 
 
+def _ext_is_text(file_name: str) -> bool:
+    """
+    Check whether a file has a known text extension.
+    
+    Args:
+        file_name: File name or path
+    
+    Returns:
+        True for known text extensions, False otherwise
+    """
+    return os.path.splitext(file_name)[1].lower() in TEXT_EXTENSIONS
+
+
+def _is_probably_text(file_name: str, data: bytes) -> bool:
+    """
+    Check whether file content looks like text.
+    
+    Args:
+        file_name: File name or path, used for the extension lookup
+        data: Raw file content (only the first 1KB is inspected)
+    
+    Returns:
+        True if the content is probably text, False otherwise
+    """
+    # Known text extensions are trusted, as in chunking.is_text_file, so any
+    # file that was indexed can also be shown as a snippet
+    if _ext_is_text(file_name):
+        return True
+    
+    sample = data[:1024]
+    
+    # Null bytes never appear in text files
+    if b'\x00' in sample:
+        return False
+    
+    # Decode incrementally so a multi-byte character cut at 1KB is not an error
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
 def _is_safe_path(file_path: str, base_dir: str) -> bool:
     """
     Check if the file path is safe (no directory traversal).
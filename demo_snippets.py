@@ -6,6 +6,19 @@ Demo script showing the enhanced query API with snippets.
 import json
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# Shared session so every call reuses the same keep-alive connection
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.headers.update({"Connection": "keep-alive"})
+
+def _timed_query(base_url, query):
+    """Post a query and return the response with its round-trip time."""
+    start_time = time.perf_counter_ns()
+    response = SESSION.post(f"{base_url}/query", json=query, timeout=30)
+    return response, (time.perf_counter_ns() - start_time) / 1e9
 
 def demo_query_with_snippets():
     """Demo the enhanced query API with snippet functionality."""
@@ -17,7 +30,7 @@ def demo_query_with_snippets():
     
     # Check if server is running
     try:
-        health_response = requests.get(f"{base_url}/health", timeout=5)
+        health_response = SESSION.get(f"{base_url}/health", timeout=5)
         if health_response.status_code != 200:
             print("❌ Server is not running. Start it with:")
             print("   uvicorn backend.app.main:app --reload")
@@ -47,64 +60,66 @@ def demo_query_with_snippets():
         }
     ]
     
-    for i, query in enumerate(sample_queries, 1):
-        print(f"\n📝 Query {i}: {query['question']}")
-        print("-" * 40)
+    # Submit every query up front so they overlap on the server
+    with ThreadPoolExecutor(max_workers=len(sample_queries)) as executor:
+        futures = [executor.submit(_timed_query, base_url, query) for query in sample_queries]
         
-        try:
-            start_time = time.time()
-            response = requests.post(f"{base_url}/query", json=query, timeout=30)
-            elapsed = time.time() - start_time
+        for i, (query, future) in enumerate(zip(sample_queries, futures), 1):
+            print(f"\n📝 Query {i}: {query['question']}")
+            print("-" * 40)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                print(f"✅ Query completed in {elapsed:.2f}s")
-                print(f"📊 Mode: {data.get('mode', 'unknown')}")
-                print(f"⚡ Server latency: {data.get('latency_ms', 0)}ms")
+            try:
+                response, elapsed = future.result()
                 
-                # Show answer
-                print(f"\n💬 Answer:")
-                print(data.get('answer', 'No answer provided'))
-                
-                # Show citations
-                citations = data.get('citations', [])
-                print(f"\n📚 Citations ({len(citations)}):")
-                for j, citation in enumerate(citations, 1):
-                    print(f"  {j}. {citation['path']}:{citation['start']}-{citation['end']} (score: {citation['score']:.2f})")
-                    if citation.get('preview'):
-                        preview = citation['preview'][:100] + "..." if len(citation['preview']) > 100 else citation['preview']
-                        print(f"     Preview: {preview.replace(chr(10), ' ')}")
-                
-                # Show snippets (NEW FEATURE)
-                snippets = data.get('snippets', [])
-                print(f"\n🔍 Code Snippets ({len(snippets)}):")
-                for j, snippet in enumerate(snippets, 1):
-                    print(f"  {j}. {snippet['path']} (lines {snippet['window_start']}-{snippet['window_end']})")
+                if response.status_code == 200:
+                    data = response.json()
                     
-                    # Show first few lines of code
-                    code_lines = snippet['code'].splitlines()
-                    preview_lines = code_lines[:8]  # Show first 8 lines
+                    print(f"✅ Query completed in {elapsed:.2f}s")
+                    print(f"📊 Mode: {data.get('mode', 'unknown')}")
+                    print(f"⚡ Server latency: {data.get('latency_ms', 0)}ms")
                     
-                    print("     Code:")
-                    for line_num, line in enumerate(preview_lines, snippet['window_start']):
-                        # Highlight the original match lines
-                        marker = ">>>" if snippet['start'] <= line_num <= snippet['end'] else "   "
-                        print(f"     {marker} {line_num:3d}: {line}")
+                    # Show answer
+                    print(f"\n💬 Answer:")
+                    print(data.get('answer', 'No answer provided'))
                     
-                    if len(code_lines) > 8:
-                        print(f"     ... ({len(code_lines) - 8} more lines)")
-                    print()
-                
-            else:
-                print(f"❌ Query failed with status {response.status_code}")
-                print(f"Response: {response.text}")
-                
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Request failed: {e}")
-        
-        if i < len(sample_queries):
-            print("\n" + "="*60)
+                    # Show citations
+                    citations = data.get('citations', [])
+                    print(f"\n📚 Citations ({len(citations)}):")
+                    for j, citation in enumerate(citations, 1):
+                        print(f"  {j}. {citation['path']}:{citation['start']}-{citation['end']} (score: {citation['score']:.2f})")
+                        if citation.get('preview'):
+                            preview = citation['preview'][:100] + "..." if len(citation['preview']) > 100 else citation['preview']
+                            print(f"     Preview: {preview.replace(chr(10), ' ')}")
+                    
+                    # Show snippets (NEW FEATURE)
+                    snippets = data.get('snippets', [])
+                    print(f"\n🔍 Code Snippets ({len(snippets)}):")
+                    for j, snippet in enumerate(snippets, 1):
+                        print(f"  {j}. {snippet['path']} (lines {snippet['window_start']}-{snippet['window_end']})")
+                        
+                        # Show first few lines of code
+                        code_lines = snippet['code'].splitlines()
+                        preview_lines = code_lines[:8]  # Show first 8 lines
+                        
+                        print("     Code:")
+                        for line_num, line in enumerate(preview_lines, snippet['window_start']):
+                            # Highlight the original match lines
+                            marker = ">>>" if snippet['start'] <= line_num <= snippet['end'] else "   "
+                            print(f"     {marker} {line_num:3d}: {line}")
+                        
+                        if len(code_lines) > 8:
+                            print(f"     ... ({len(code_lines) - 8} more lines)")
+                        print()
+                    
+                else:
+                    print(f"❌ Query failed with status {response.status_code}")
+                    print(f"Response: {response.text}")
+                    
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Request failed: {e}")
+            
+            if i < len(sample_queries):
+                print("\n" + "="*60)
     
     print("\n🎉 Demo completed!")
     print("\nKey improvements with snippets:")
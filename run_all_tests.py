@@ -3,100 +3,232 @@
 Master Test Runner - Runs all test suites and provides comprehensive report
 """
 
+import argparse
+import copy
+import importlib.util
 import subprocess
 import sys
 import time
 import os
 import json
+import queue
+import threading
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Any
 
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    import selenium
+except ImportError:
+    selenium = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Interpreter used to launch each suite
+PYTHON = sys.executable
+
+# Where JSON reports are written
+REPORTS_DIR = "test_reports"
+
+# Last known duration of each suite, used to start the longest suites first
+DURATIONS_FILE = os.path.join(REPORTS_DIR, "durations.json")
+
+# Lines of each suite's output kept for the report; the rest is only echoed
+OUTPUT_TAIL_LINES = 1000
+
+# Per-suite time limit, in seconds
+SUITE_TIMEOUT = 300
+
+# Opt-in warm worker that runs suites in-process (see scripts/test_worker.py);
+# suites run in fresh interpreters unless --warm-worker is given
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts", "test_worker.py")
+WORKER_DONE_MARKER = "__TEST_WORKER_DONE__"
+
+# Successful health probes are cached briefly so back-to-back runs skip the network
+_HEALTH_CACHE = os.path.expanduser("~/.cache/codebase_qa/health.json")
+_HEALTH_TTL = 30
+
+# Probes run concurrently: one keep-alive session, and a lock around the cache file
+_SESSION = requests.Session() if requests is not None else None
+_HEALTH_LOCK = threading.Lock()
+
+def _load_health_cache() -> Dict[str, Any]:
+    """Read the health cache, treating a missing or corrupt file as empty"""
+    try:
+        with open(_HEALTH_CACHE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _cached_get(url: str, ttl: int = _HEALTH_TTL, use_cache: bool = True) -> int:
+    """Return the HTTP status for url, reusing a recent successful probe if allowed"""
+    if use_cache:
+        with _HEALTH_LOCK:
+            entry = _load_health_cache().get(url)
+        if entry and time.time() - entry["ts"] < ttl:
+            return entry["status"]
+    
+    status = _http_status(url)
+    
+    # Only cache healthy responses so a server that just came up is seen immediately
+    if status == 200:
+        with _HEALTH_LOCK:
+            cache = _load_health_cache()
+            cache[url] = {"status": status, "ts": time.time()}
+            try:
+                os.makedirs(os.path.dirname(_HEALTH_CACHE), exist_ok=True)
+                with open(_HEALTH_CACHE, 'w') as f:
+                    json.dump(cache, f)
+            except OSError:
+                pass
+    
+    return status
+
+def _http_status(url: str) -> int:
+    """GET url and return its HTTP status, via urllib when requests is missing"""
+    if _SESSION is not None:
+        # Fail fast on a dead port (1s connect) while allowing a slow reply (5s read)
+        return _SESSION.get(url, timeout=(1, 5)).status_code
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def _probe(url: str, use_cache: bool = True):
+    """Return (status, None) for a completed probe or (None, error) if it failed"""
+    try:
+        return _cached_get(url, use_cache=use_cache), None
+    except Exception as e:
+        return None, e
+
+def _dump_report(report: Dict[str, Any]) -> bytes:
+    """Serialize a report as indented JSON, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    return json.dumps(report, indent=2).encode()
+
 class TestSuite:
-    def __init__(self, name: str, script: str, description: str, required: bool = True):
+    __slots__ = ("name", "script", "description", "required", "exclusive", "result", "duration", "output")
+    
+    def __init__(self, name: str, script: str, description: str, required: bool = True,
+                 exclusive: bool = False):
         self.name = name
         self.script = script
         self.description = description
         self.required = required
+        # Exclusive suites run alone, after the concurrent ones
+        self.exclusive = exclusive
         self.result = None
         self.duration = 0
         self.output = ""
 
+# Suites run by default; built once at import and copied per runner
+_DEFAULT_SUITES = (
+    TestSuite(
+        "Comprehensive API Tests",
+        "tests/test_comprehensive.py",
+        "End-to-end API functionality, security, and integration tests",
+        required=True
+    ),
+    TestSuite(
+        "Performance Tests",
+        "tests/test_performance.py",
+        "Load testing, concurrent requests, and performance benchmarks",
+        required=True,
+        exclusive=True  # Timing thresholds assume nothing else is loading the backend
+    ),
+    TestSuite(
+        "Frontend E2E Tests",
+        "tests/test_frontend_e2e.py",
+        "Frontend user interface and user experience tests",
+        required=False  # Optional since it requires Selenium
+    ),
+    TestSuite(
+        "Basic Deployment Test",
+        "test_deployment.py",
+        "Basic deployment verification and smoke tests",
+        required=True
+    )
+)
+
 class MasterTestRunner:
-    def __init__(self):
-        self.test_suites = [
-            TestSuite(
-                "Comprehensive API Tests",
-                "tests/test_comprehensive.py",
-                "End-to-end API functionality, security, and integration tests",
-                required=True
-            ),
-            TestSuite(
-                "Performance Tests",
-                "tests/test_performance.py",
-                "Load testing, concurrent requests, and performance benchmarks",
-                required=True
-            ),
-            TestSuite(
-                "Frontend E2E Tests",
-                "tests/test_frontend_e2e.py",
-                "Frontend user interface and user experience tests",
-                required=False  # Optional since it requires Selenium
-            ),
-            TestSuite(
-                "Basic Deployment Test",
-                "test_deployment.py",
-                "Basic deployment verification and smoke tests",
-                required=True
-            )
-        ]
+    # Set once the reports directory is known to exist in this process
+    _reports_dir_ready = False
+    
+    def __init__(self, use_cache: bool = True, warm_worker: bool = False):
+        self.use_cache = use_cache
+        self.warm_worker = warm_worker
+        # Fresh copies so each runner has its own mutable result state
+        self.test_suites = [copy.copy(suite) for suite in _DEFAULT_SUITES]
         self.results = {}
         self.start_time = None
         self.end_time = None
+        self._now = datetime.now()
+        self._print_lock = threading.Lock()
+        self._workers = queue.Queue()  # idle warm worker processes
     
     def check_prerequisites(self) -> bool:
         """Check if all prerequisites are met"""
         print("🔍 Checking Prerequisites...")
         
+        # Probe backend and frontend at the same time. The backend gates the
+        # whole run, so it is always probed live rather than from the cache
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            backend_future = executor.submit(_probe, "http://localhost:8000/health", False)
+            frontend_future = executor.submit(_probe, "http://localhost:3001", self.use_cache)
+            backend_status, backend_error = backend_future.result()
+            frontend_status, frontend_error = frontend_future.result()
+        
         # Check if backend is running
-        try:
-            import requests
-            response = requests.get("http://localhost:8000/health", timeout=5)
-            if response.status_code == 200:
-                print("✅ Backend is running")
-            else:
-                print("❌ Backend is not responding correctly")
-                return False
-        except Exception as e:
-            print(f"❌ Backend is not accessible: {e}")
+        if backend_error is not None:
+            print(f"❌ Backend is not accessible: {backend_error}")
             print("💡 Make sure to start the backend first:")
             print("   cd backend && python -m uvicorn app.main:app --reload --host 0.0.0.0 --port 8000")
             return False
+        if backend_status == 200:
+            print("✅ Backend is running")
+        else:
+            print("❌ Backend is not responding correctly")
+            return False
         
         # Check if frontend is running
-        try:
-            response = requests.get("http://localhost:3001", timeout=5)
-            if response.status_code == 200:
-                print("✅ Frontend is running")
-            else:
-                print("⚠️  Frontend may not be running (some tests will be skipped)")
-        except Exception as e:
+        if frontend_error is not None:
             print("⚠️  Frontend is not accessible (some tests will be skipped)")
+        elif frontend_status == 200:
+            print("✅ Frontend is running")
+        else:
+            print("⚠️  Frontend may not be running (some tests will be skipped)")
         
         # Check Python dependencies
         required_packages = ["requests"]
         for package in required_packages:
+            # find_spec handles dotted names without importing the module
             try:
-                __import__(package)
+                available = importlib.util.find_spec(package) is not None
+            except ModuleNotFoundError:
+                available = False
+            if available:
                 print(f"✅ {package} is available")
-            except ImportError:
+            else:
                 print(f"❌ {package} is not installed")
                 return False
         
         # Check optional dependencies
-        try:
-            import selenium
+        if selenium is not None:
             print("✅ Selenium is available (frontend tests will run)")
-        except ImportError:
+        else:
             print("⚠️  Selenium not available (frontend tests will be skipped)")
             # Mark frontend tests as not required
             for suite in self.test_suites:
@@ -107,40 +239,31 @@ class MasterTestRunner:
     
     def run_test_suite(self, suite: TestSuite) -> bool:
         """Run a single test suite"""
-        print(f"\n🚀 Running {suite.name}...")
-        print(f"📝 {suite.description}")
-        print("-" * 50)
-        
-        if not os.path.exists(suite.script):
-            print(f"❌ Test script not found: {suite.script}")
-            suite.result = False
-            return False
+        with self._print_lock:
+            print(f"\n🚀 Running {suite.name}...")
+            print(f"📝 {suite.description}")
+            print("-" * 50)
         
         start_time = time.time()
         
         try:
-            # Run the test script
-            result = subprocess.run(
-                [sys.executable, suite.script],
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout per test suite
-            )
+            if self.warm_worker:
+                returncode, timed_out, lines = self._run_in_worker(suite)
+            else:
+                returncode, timed_out, lines = self._run_isolated(suite)
             
             suite.duration = time.time() - start_time
-            suite.output = result.stdout + result.stderr
-            suite.result = result.returncode == 0
+            suite.output = "".join(lines)
+            
+            if timed_out:
+                raise subprocess.TimeoutExpired(suite.script, SUITE_TIMEOUT)
             
-            # Print the output
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr)
+            suite.result = returncode == 0
             
             if suite.result:
-                print(f"✅ {suite.name} completed successfully in {suite.duration:.1f}s")
+                self._print(f"✅ {suite.name} completed successfully in {suite.duration:.1f}s")
             else:
-                print(f"❌ {suite.name} failed after {suite.duration:.1f}s")
+                self._print(f"❌ {suite.name} failed after {suite.duration:.1f}s")
             
             return suite.result
             
@@ -148,46 +271,158 @@ class MasterTestRunner:
             suite.duration = time.time() - start_time
             suite.result = False
             suite.output = "Test suite timed out after 5 minutes"
-            print(f"⏰ {suite.name} timed out after {suite.duration:.1f}s")
+            self._print(f"⏰ {suite.name} timed out after {suite.duration:.1f}s")
             return False
             
         except Exception as e:
             suite.duration = time.time() - start_time
             suite.result = False
             suite.output = str(e)
-            print(f"💥 {suite.name} failed with error: {e}")
+            self._print(f"💥 {suite.name} failed with error: {e}")
             return False
     
+    def _run_isolated(self, suite: TestSuite):
+        """Run a suite in a fresh interpreter; returns (returncode, timed_out, lines)"""
+        # Stream the merged stdout/stderr as it arrives
+        proc = subprocess.Popen(
+            [PYTHON, suite.script],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        timed_out, timer = self._start_timeout(proc)
+        
+        lines = deque(maxlen=OUTPUT_TAIL_LINES)
+        try:
+            self._stream_output(suite, proc.stdout, lines)
+            proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+        
+        return proc.returncode, timed_out.is_set(), lines
+    
+    def _run_in_worker(self, suite: TestSuite):
+        """Run a suite in a warm worker interpreter; returns (returncode, timed_out, lines)"""
+        worker = self._acquire_worker()
+        timed_out, timer = self._start_timeout(worker)
+        
+        lines = deque(maxlen=OUTPUT_TAIL_LINES)
+        try:
+            worker.stdin.write(f"{suite.script}\n")
+            worker.stdin.flush()
+            done = self._stream_output(suite, worker.stdout, lines)
+        finally:
+            timer.cancel()
+        
+        if done is None:
+            # The worker died (killed on timeout or crashed), so it is not reused
+            worker.kill()
+            worker.wait()
+            return 1, timed_out.is_set(), lines
+        
+        self._workers.put(worker)
+        return int(done.split()[1]), False, lines
+    
+    def _stream_output(self, suite: TestSuite, stream, lines: deque):
+        """Echo suite output live, keeping only its tail, until EOF or a worker done marker (returned)"""
+        for line in stream:
+            marker_at = line.find(WORKER_DONE_MARKER)
+            if marker_at >= 0:
+                # The suite's last line may lack a newline, leaving the marker mid-line
+                if marker_at:
+                    lines.append(line[:marker_at] + "\n")
+                    self._print(f"[{suite.name}] {line[:marker_at]}")
+                return line[marker_at:]
+            lines.append(line)
+            # Prefix with the suite name so concurrent suites stay readable
+            self._print(f"[{suite.name}] {line}", end="")
+        return None
+    
+    def _start_timeout(self, proc: subprocess.Popen):
+        """Kill proc once SUITE_TIMEOUT passes; the blocking read loop then ends"""
+        timed_out = threading.Event()
+        
+        def _kill():
+            timed_out.set()
+            proc.kill()
+        
+        timer = threading.Timer(SUITE_TIMEOUT, _kill)
+        timer.daemon = True
+        timer.start()
+        return timed_out, timer
+    
+    def _acquire_worker(self) -> subprocess.Popen:
+        """Take an idle worker from the pool, starting a new one if none is free"""
+        try:
+            return self._workers.get_nowait()
+        except queue.Empty:
+            return subprocess.Popen(
+                [PYTHON, "-u", WORKER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1
+            )
+    
+    def _close_workers(self):
+        """Shut down idle workers by closing their stdin"""
+        while True:
+            try:
+                worker = self._workers.get_nowait()
+            except queue.Empty:
+                break
+            worker.stdin.close()
+            try:
+                worker.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+            worker.stdout.close()
+    
+    def _print(self, *args, **kwargs):
+        """Print under the runner lock so concurrent suites don't interleave mid-line"""
+        with self._print_lock:
+            print(*args, **kwargs, flush=True)
+    
     def generate_report(self) -> Dict[str, Any]:
         """Generate comprehensive test report"""
         total_duration = self.end_time - self.start_time if self.end_time and self.start_time else 0
         
-        report = {
-            "timestamp": datetime.now().isoformat(),
-            "total_duration": total_duration,
-            "summary": {
-                "total_suites": len(self.test_suites),
-                "passed_suites": sum(1 for suite in self.test_suites if suite.result),
-                "failed_suites": sum(1 for suite in self.test_suites if suite.result is False),
-                "skipped_suites": sum(1 for suite in self.test_suites if suite.result is None),
-                "required_passed": sum(1 for suite in self.test_suites if suite.required and suite.result),
-                "required_total": sum(1 for suite in self.test_suites if suite.required)
-            },
-            "suites": []
-        }
-        
+        # Tally the summary and build per-suite entries in a single pass
+        passed = failed = skipped = required_passed = required_total = 0
+        suites = []
         for suite in self.test_suites:
-            suite_report = {
+            result = suite.result
+            passed += result is True
+            failed += result is False
+            skipped += result is None
+            required_total += suite.required
+            required_passed += suite.required and result is True
+            
+            suites.append({
                 "name": suite.name,
                 "description": suite.description,
                 "required": suite.required,
-                "result": suite.result,
+                "result": result,
                 "duration": suite.duration,
                 "output_length": len(suite.output) if suite.output else 0
-            }
-            report["suites"].append(suite_report)
+            })
         
-        return report
+        return {
+            "timestamp": self._now.isoformat(),
+            "total_duration": total_duration,
+            "summary": {
+                "total_suites": len(self.test_suites),
+                "passed_suites": passed,
+                "failed_suites": failed,
+                "skipped_suites": skipped,
+                "required_passed": required_passed,
+                "required_total": required_total
+            },
+            "suites": suites
+        }
     
     def print_summary(self, report: Dict[str, Any]):
         """Print test summary"""
@@ -229,17 +464,39 @@ class MasterTestRunner:
     def save_report(self, report: Dict[str, Any]):
         """Save report to file"""
         try:
-            os.makedirs("test_reports", exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"test_reports/test_report_{timestamp}.json"
+            if not MasterTestRunner._reports_dir_ready:
+                os.makedirs(REPORTS_DIR, exist_ok=True)
+                MasterTestRunner._reports_dir_ready = True
+            now = self._now
+            timestamp = f"{now.year:04d}{now.month:02d}{now.day:02d}_{now.hour:02d}{now.minute:02d}{now.second:02d}"
+            filename = f"{REPORTS_DIR}/test_report_{timestamp}.json"
             
-            with open(filename, 'w') as f:
-                json.dump(report, f, indent=2)
+            with open(filename, 'wb') as f:
+                f.write(_dump_report(report))
             
             print(f"📄 Detailed report saved to: {filename}")
         except Exception as e:
             print(f"⚠️  Could not save report: {e}")
     
+    def _load_durations(self) -> Dict[str, float]:
+        """Load the last recorded duration of each suite, keyed by suite name"""
+        try:
+            with open(DURATIONS_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_durations(self):
+        """Merge this run's suite durations into the history used for scheduling"""
+        history = self._load_durations()
+        history.update({suite.name: suite.duration for suite in self.test_suites if suite.result is not None})
+        try:
+            os.makedirs(REPORTS_DIR, exist_ok=True)
+            with open(DURATIONS_FILE, 'w') as f:
+                json.dump(history, f, indent=2)
+        except OSError as e:
+            print(f"⚠️  Could not save suite durations: {e}")
+    
     def run_all_tests(self) -> bool:
         """Run all test suites and return overall success"""
         print("🧪 MASTER TEST RUNNER - CodeBase QA Agent")
@@ -252,24 +509,64 @@ class MasterTestRunner:
         
         self.start_time = time.time()
         
-        # Run each test suite
+        # Fail suites whose scripts are missing before spending a worker on them
+        runnable = []
         for suite in self.test_suites:
+            if os.path.isfile(suite.script):
+                runnable.append(suite)
+            else:
+                suite.result = False
+                suite.output = f"Test script not found: {suite.script}"
+                print(f"❌ Test script not found: {suite.script}")
+        
+        # Longest-first scheduling: unknown suites first, then by last recorded duration
+        history = self._load_durations()
+        runnable.sort(key=lambda suite: -history.get(suite.name, float("inf")))
+        
+        concurrent = [suite for suite in runnable if not suite.exclusive]
+        exclusive = [suite for suite in runnable if suite.exclusive]
+        
+        # Suites are independent, so run them concurrently (at most one per CPU)
+        interrupted = False
+        max_workers = max(1, min(len(concurrent), os.cpu_count() or 1))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.run_test_suite, suite): suite for suite in concurrent}
+            try:
+                for future in as_completed(futures):
+                    suite = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self._print(f"\n💥 Unexpected error in {suite.name}: {e}")
+                        suite.result = False
+            except KeyboardInterrupt:
+                interrupted = True
+                self._print("\n🛑 Test run interrupted by user")
+                for future, suite in futures.items():
+                    if future.cancel():
+                        suite.result = None
+        
+        # Then the exclusive suites, one at a time against an otherwise idle backend
+        for suite in exclusive:
+            if interrupted:
+                suite.result = None
+                continue
             try:
                 self.run_test_suite(suite)
             except KeyboardInterrupt:
-                print(f"\n🛑 Test suite {suite.name} interrupted by user")
+                interrupted = True
+                self._print("\n🛑 Test run interrupted by user")
                 suite.result = None
-                break
-            except Exception as e:
-                print(f"\n💥 Unexpected error in {suite.name}: {e}")
-                suite.result = False
         
+        self._close_workers()
         self.end_time = time.time()
+        self._now = datetime.now()  # one timestamp for both the report and its filename
         
         # Generate and display report
         report = self.generate_report()
         self.print_summary(report)
         self.save_report(report)
+        self._save_durations()
         
         # Return overall success
         required_passed = report['summary']['required_passed']
@@ -278,7 +575,15 @@ class MasterTestRunner:
 
 def main():
     """Main entry point"""
-    runner = MasterTestRunner()
+    parser = argparse.ArgumentParser(description="Run all CodeBase QA Agent test suites")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-probe frontend health (the backend always is)")
+    parser.add_argument(
+        "--warm-worker", action="store_true",
+        help="Run suites in shared warm interpreters instead of one fresh interpreter each (no isolation)"
+    )
+    args = parser.parse_args()
+    
+    runner = MasterTestRunner(use_cache=not args.no_cache, warm_worker=args.warm_worker)
     
     try:
         success = runner.run_all_tests()
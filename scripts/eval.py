@@ -4,17 +4,71 @@ Evaluation script for testing retrieval precision on canned Q&A pairs.
 """
 
 import asyncio
-import sys
+import functools
+import importlib.util
 import json
-from pathlib import Path
 import click
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 
-# Add the backend directory to the Python path
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-from app.core.schemas import QueryRequest
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Consecutive failed cases that abort a --fail-fast run
+MAX_CONSECUTIVE_FAILURES = 3
+
+# httpx only negotiates HTTP/2 when the h2 package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Canned test questions and the patterns that mark a relevant citation
+TEST_CASES = (
+    {
+        "question": "Where is authentication implemented?",
+        "expected_patterns": ["auth", "login", "authenticate", "jwt", "token"],
+        "expected_files": ["auth", "login", "jwt", "middleware"]
+    },
+    {
+        "question": "How is routing handled?",
+        "expected_patterns": ["route", "router", "endpoint", "path"],
+        "expected_files": ["route", "router", "main", "app"]
+    },
+    {
+        "question": "Where are database models defined?",
+        "expected_patterns": ["model", "database", "db", "schema"],
+        "expected_files": ["model", "db", "schema", "database"]
+    },
+    {
+        "question": "How is error handling implemented?",
+        "expected_patterns": ["error", "exception", "try", "catch", "except"],
+        "expected_files": ["error", "exception", "handler"]
+    },
+    {
+        "question": "Where is configuration managed?",
+        "expected_patterns": ["config", "settings", "env", "environment"],
+        "expected_files": ["config", "settings", "env"]
+    }
+)
 
 
 @click.command()
@@ -22,50 +76,22 @@ from app.core.schemas import QueryRequest
 @click.option('--api-url', default='http://localhost:8000', help='API server URL')
 @click.option('--output', default='eval_results.json', help='Output file for results')
 @click.option('--verbose', '-v', is_flag=True, help='Verbose output')
-def eval_qa(repo, api_url, output, verbose):
+@click.option('--fail-fast', is_flag=True, help='Abort remaining cases on repeated failures or a latency budget breach')
+@click.option('--latency-budget-ms', default=10000.0, help='Average latency that aborts a --fail-fast run')
+def eval_qa(repo, api_url, output, verbose, fail_fast, latency_budget_ms):
     """Evaluate the QA system on canned questions."""
     
-    # Define test questions and expected patterns
-    test_cases = [
-        {
-            "question": "Where is authentication implemented?",
-            "expected_patterns": ["auth", "login", "authenticate", "jwt", "token"],
-            "expected_files": ["auth", "login", "jwt", "middleware"]
-        },
-        {
-            "question": "How is routing handled?",
-            "expected_patterns": ["route", "router", "endpoint", "path"],
-            "expected_files": ["route", "router", "main", "app"]
-        },
-        {
-            "question": "Where are database models defined?",
-            "expected_patterns": ["model", "database", "db", "schema"],
-            "expected_files": ["model", "db", "schema", "database"]
-        },
-        {
-            "question": "How is error handling implemented?",
-            "expected_patterns": ["error", "exception", "try", "catch", "except"],
-            "expected_files": ["error", "exception", "handler"]
-        },
-        {
-            "question": "Where is configuration managed?",
-            "expected_patterns": ["config", "settings", "env", "environment"],
-            "expected_files": ["config", "settings", "env"]
-        }
-    ]
-    
     if verbose:
         click.echo(f"Evaluating repository: {repo}")
         click.echo(f"API URL: {api_url}")
         click.echo(f"Output file: {output}")
         click.echo()
     
-    # Run evaluation
-    results = asyncio.run(_run_evaluation(test_cases, repo, api_url, verbose))
-    
-    # Save results
-    with open(output, 'w') as f:
-        json.dump(results, f, indent=2)
+    # Run evaluation, streaming each case result to the output file
+    results = asyncio.run(_run_evaluation(
+        TEST_CASES, repo, api_url, output, verbose,
+        latency_budget_ms if fail_fast else None
+    ))
     
     # Print summary
     _print_summary(results)
@@ -73,39 +99,114 @@ def eval_qa(repo, api_url, output, verbose):
     click.echo(f"\nResults saved to: {output}")
 
 
-async def _run_evaluation(test_cases: List[Dict], repo: str, api_url: str, verbose: bool) -> Dict[str, Any]:
-    """Run evaluation on test cases."""
+async def _run_evaluation(test_cases: Sequence[Dict], repo: str, api_url: str, output: str, verbose: bool,
+                          latency_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+    """Run evaluation on test cases, writing each result to `output` as it completes.
+    
+    When `latency_budget_ms` is set the run fails fast: remaining cases are
+    cancelled after repeated failures or once the average latency exceeds it.
+    """
     results = {
         "repo": repo,
         "api_url": api_url,
-        "test_cases": [],
         "summary": {}
     }
+    # Only the fields the summary needs are kept in memory
+    case_stats = []
+    consecutive_failures = 0
+    latency_sum = 0.0
+    latency_count = 0
+    abort_reason = None
+    
+    # HTTP/2 is negotiated via TLS ALPN, so it only applies to https URLs;
+    # there every query is multiplexed over a single connection
+    http2 = HTTP2_AVAILABLE and api_url.startswith("https://")
+    
+    # Otherwise one pooled connection per case so every query can be in flight at once
+    connections = 1 if http2 else len(test_cases)
+    limits = httpx.Limits(
+        max_connections=connections,
+        max_keepalive_connections=connections
+    )
     
-    async with httpx.AsyncClient() as client:
-        for i, test_case in enumerate(test_cases, 1):
-            if verbose:
-                click.echo(f"Testing case {i}/{len(test_cases)}: {test_case['question']}")
+    with open(output, 'wb') as f:
+        f.write(b'{"repo": ' + _dumps(repo) + b', "api_url": ' + _dumps(api_url) + b', "test_cases": [\n')
+        
+        async with httpx.AsyncClient(http2=http2, limits=limits, timeout=30.0) as client:
+            tasks = [
+                asyncio.create_task(_evaluate_indexed_case(i, client, test_case, repo, api_url))
+                for i, test_case in enumerate(test_cases, 1)
+            ]
             
-            case_result = await _evaluate_case(client, test_case, repo, api_url)
-            results["test_cases"].append(case_result)
+            for next_result in asyncio.as_completed(tasks):
+                i, case_result = await next_result
+                
+                if case_stats:
+                    f.write(b",\n")
+                f.write(_dumps(case_result))
+                f.flush()
+                
+                case_stats.append({
+                    "success": case_result.get("success", False),
+                    "precision_at_k": case_result.get("precision_at_k", 0.0),
+                    "latency_ms": case_result.get("latency_ms", 0)
+                })
+                
+                if verbose:
+                    _print_case_result(case_result, f"Tested case {i}/{len(test_cases)}: {case_result['question']}")
+                
+                if latency_budget_ms is None:
+                    continue
+                
+                if case_result.get("success", False):
+                    consecutive_failures = 0
+                    latency_sum += case_result["latency_ms"]
+                    latency_count += 1
+                else:
+                    consecutive_failures += 1
+                
+                if consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    abort_reason = f"{consecutive_failures} consecutive failures"
+                elif latency_count and latency_sum / latency_count > latency_budget_ms:
+                    abort_reason = f"average latency above {latency_budget_ms:.0f}ms"
+                
+                if abort_reason:
+                    click.echo(f"Aborting remaining cases: {abort_reason}")
+                    for task in tasks:
+                        task.cancel()
+                    break
             
-            if verbose:
-                _print_case_result(case_result)
-                click.echo()
+            # Let cancelled cases unwind before the client closes
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Calculate summary statistics
+        results["summary"] = _calculate_summary(case_stats)
+        if abort_reason:
+            results["summary"]["aborted"] = abort_reason
+        f.write(b'\n], "summary": ' + _dumps(results["summary"], indent=True) + b'}\n')
     
-    # Calculate summary statistics
-    results["summary"] = _calculate_summary(results["test_cases"])
+    if verbose:
+        cache_info = _citation_matches.cache_info()
+        click.echo(f"Citation match cache: {cache_info.hits} hits, {cache_info.misses} misses")
+        click.echo()
     
     return results
 
 
+async def _evaluate_indexed_case(index: int, client: httpx.AsyncClient, test_case: Dict, repo: str, api_url: str):
+    """Evaluate a test case and return it with its 1-based index."""
+    return index, await _evaluate_case(client, test_case, repo, api_url)
+
+
 async def _evaluate_case(client: httpx.AsyncClient, test_case: Dict, repo: str, api_url: str) -> Dict[str, Any]:
     """Evaluate a single test case."""
     question = test_case["question"]
     expected_patterns = test_case["expected_patterns"]
     expected_files = test_case["expected_files"]
     
+    # Lowercase the patterns once per case rather than once per citation
+    patterns_lc, files_lc = _lowercase_patterns(test_case)
+    
     # Send query
     try:
         response = await client.post(
@@ -119,13 +220,13 @@ async def _evaluate_case(client: httpx.AsyncClient, test_case: Dict, repo: str,
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = _loads(response.content)
             
             # Analyze results
             precision_at_k = _calculate_precision_at_k(
                 result["citations"],
-                expected_patterns,
-                expected_files
+                patterns_lc,
+                files_lc
             )
             
             return {
@@ -153,35 +254,83 @@ async def _evaluate_case(client: httpx.AsyncClient, test_case: Dict, repo: str,
         }
 
 
-def _calculate_precision_at_k(citations: List[Dict], expected_patterns: List[str], expected_files: List[str]) -> float:
-    """Calculate precision@k for retrieved citations."""
+def _lowercase_patterns(test_case: Dict) -> tuple:
+    """Return a case's content and file patterns as lowercased tuples."""
+    return (
+        tuple(pattern.lower() for pattern in test_case["expected_patterns"]),
+        tuple(pattern.lower() for pattern in test_case["expected_files"])
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_matcher(patterns_lc: tuple, files_lc: tuple):
+    """Build one Aho-Corasick automaton per pattern set, tagging content/file patterns."""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for kind, patterns in (("content", patterns_lc), ("file", files_lc)):
+        for pattern in patterns:
+            # A pattern may be listed for both content and files
+            automaton.add_word(pattern, automaton.get(pattern, frozenset()) | {kind})
+    
+    if len(automaton) == 0:
+        return None
+    
+    automaton.make_automaton()
+    return automaton
+
+
+@functools.lru_cache(maxsize=8192)
+def _citation_matches(path_lc: str, content_lc: str, patterns_lc: tuple, files_lc: tuple) -> bool:
+    """Check whether a lowercased citation matches a case's lowercased content or file patterns."""
+    matcher = _get_matcher(patterns_lc, files_lc)
+    
+    if matcher is not None:
+        # Single linear pass over each string instead of one scan per pattern
+        return (
+            any("content" in kinds for _, kinds in matcher.iter(content_lc))
+            or any("file" in kinds for _, kinds in matcher.iter(path_lc))
+        )
+    
+    return (
+        any(pattern in content_lc for pattern in patterns_lc)
+        or any(pattern in path_lc for pattern in files_lc)
+    )
+
+
+def _calculate_precision_at_k(citations: List[Dict], patterns_lc: tuple, files_lc: tuple) -> float:
+    """Calculate precision@k for retrieved citations against pre-lowercased patterns."""
     if not citations:
         return 0.0
     
-    relevant_count = 0
-    
-    for citation in citations:
-        # Check if citation content matches expected patterns
-        content = citation.get("content", "").lower()
-        path = citation.get("path", "").lower()
-        
-        # Check content patterns
-        content_match = any(pattern.lower() in content for pattern in expected_patterns)
-        
-        # Check file patterns
-        file_match = any(pattern.lower() in path for pattern in expected_files)
-        
-        if content_match or file_match:
-            relevant_count += 1
+    # Recurring citations (same file, same chunk) hit the cache
+    relevant_count = sum(
+        _citation_matches(
+            citation.get("path", "").lower(),
+            citation.get("content", "").lower(),
+            patterns_lc,
+            files_lc
+        )
+        for citation in citations
+    )
     
     return relevant_count / len(citations)
 
 
 def _calculate_summary(test_cases: List[Dict]) -> Dict[str, Any]:
     """Calculate summary statistics."""
-    successful_cases = [case for case in test_cases if case.get("success", False)]
+    # One pass over the cases accumulates every statistic
+    successful_count = 0
+    precision_sum = 0.0
+    latency_sum = 0.0
+    for case in test_cases:
+        if case.get("success", False):
+            successful_count += 1
+            precision_sum += case["precision_at_k"]
+            latency_sum += case["latency_ms"]
     
-    if not successful_cases:
+    if not successful_count:
         return {
             "total_cases": len(test_cases),
             "successful_cases": 0,
@@ -190,27 +339,30 @@ def _calculate_summary(test_cases: List[Dict]) -> Dict[str, Any]:
             "avg_latency_ms": 0.0
         }
     
-    avg_precision = sum(case["precision_at_k"] for case in successful_cases) / len(successful_cases)
-    avg_latency = sum(case["latency_ms"] for case in successful_cases) / len(successful_cases)
-    
     return {
         "total_cases": len(test_cases),
-        "successful_cases": len(successful_cases),
-        "success_rate": len(successful_cases) / len(test_cases),
-        "avg_precision_at_k": avg_precision,
-        "avg_latency_ms": avg_latency
+        "successful_cases": successful_count,
+        "success_rate": successful_count / len(test_cases),
+        "avg_precision_at_k": precision_sum / successful_count,
+        "avg_latency_ms": latency_sum / successful_count
     }
 
 
-def _print_case_result(case_result: Dict):
-    """Print a single case result."""
+def _print_case_result(case_result: Dict, header: str):
+    """Print a single case result under `header` with one write."""
     if case_result.get("success", False):
-        click.echo(f"  ✅ Success")
-        click.echo(f"  Precision@K: {case_result['precision_at_k']:.3f}")
-        click.echo(f"  Latency: {case_result['latency_ms']}ms")
-        click.echo(f"  Citations: {len(case_result['citations'])}")
+        lines = [
+            header,
+            f"  ✅ Success",
+            f"  Precision@K: {case_result['precision_at_k']:.3f}",
+            f"  Latency: {case_result['latency_ms']}ms",
+            f"  Citations: {len(case_result['citations'])}"
+        ]
     else:
-        click.echo(f"  ❌ Failed: {case_result.get('error', 'Unknown error')}")
+        lines = [header, f"  ❌ Failed: {case_result.get('error', 'Unknown error')}"]
+    
+    # Trailing blank line separates consecutive cases
+    click.echo("\n".join(lines) + "\n")
 
 
 def _print_summary(results: Dict[str, Any]):
@@ -226,8 +378,15 @@ def _print_summary(results: Dict[str, Any]):
     click.echo(f"Success rate: {summary['success_rate']:.1%}")
     click.echo(f"Average Precision@K: {summary['avg_precision_at_k']:.3f}")
     click.echo(f"Average latency: {summary['avg_latency_ms']:.1f}ms")
+    if "aborted" in summary:
+        click.echo(f"Aborted early: {summary['aborted']}")
     click.echo("="*50)
 
 
+# Compile the canned cases' matchers once at import time
+for _test_case in TEST_CASES:
+    _get_matcher(*_lowercase_patterns(_test_case))
+
+
 if __name__ == '__main__':
     eval_qa()
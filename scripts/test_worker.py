@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Persistent test worker - runs test scripts inside one warm interpreter.
+
+Reads one script path per line on stdin, runs it as __main__ and then
+prints a done marker with its exit code and duration on stdout.
+"""
+
+import os
+import runpy
+import sys
+import time
+import traceback
+
+# Marker line the master runner waits for after each script
+DONE_MARKER = "__TEST_WORKER_DONE__"
+
+
+def run_script(path: str) -> int:
+    """Run a test script as if it were started with `python <path>`."""
+    saved_argv = sys.argv
+    saved_path = list(sys.path)
+    sys.argv = [path]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    
+    try:
+        runpy.run_path(path, run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    finally:
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+
+
+def main():
+    """Serve script paths from stdin until it is closed."""
+    for line in sys.stdin:
+        path = line.strip()
+        if not path:
+            continue
+        
+        start_time = time.time()
+        returncode = run_script(path)
+        duration = time.time() - start_time
+        
+        sys.stderr.flush()
+        print(f"{DONE_MARKER} {returncode} {duration:.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,187 +1,108 @@
 #!/usr/bin/env python3
 """
 Comprehensive deployment test script for CodeBase QA Agent.
+
+Requires the API to be running on localhost:8000. Run with pytest, or
+directly with `python test_deployment.py`.
 """
 
-import requests
+import asyncio
+import httpx
 import json
-import time
-import sys
-from typing import Dict, Any
+import pytest
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 API_BASE = "http://localhost:8000"
 
-def test_health():
-    """Test health endpoint."""
-    print("🔍 Testing health endpoint...")
-    try:
-        response = requests.get(f"{API_BASE}/health", timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Health check passed: {data}")
-            return True
-        else:
-            print(f"❌ Health check failed: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Health check error: {e}")
-        return False
+# Repository ingested once for the whole module and deleted afterwards
+REPO_ID = "test-deployment-repo"
 
-def test_repos_list():
-    """Test repositories list endpoint."""
-    print("\n🔍 Testing repositories list...")
-    try:
-        response = requests.get(f"{API_BASE}/repos", timeout=10)
-        if response.status_code == 200:
-            repos = response.json()
-            print(f"✅ Repositories list: {len(repos)} repos found")
-            return repos
-        else:
-            print(f"❌ Repositories list failed: {response.status_code}")
-            return []
-    except Exception as e:
-        print(f"❌ Repositories list error: {e}")
-        return []
+def _loads(data: bytes) -> Any:
+    """Parse a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-def test_ingest_repo():
-    """Test repository ingestion."""
-    print("\n🔍 Testing repository ingestion...")
-    
+@pytest.fixture(scope="module")
+def event_loop():
+    """Module-wide event loop so the client and ingested repo can be shared."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+@pytest.fixture(scope="module")
+async def client():
+    """Pooled client shared by every deployment test."""
+    limits = httpx.Limits(max_keepalive_connections=10)
+    async with httpx.AsyncClient(base_url=API_BASE, limits=limits, timeout=30) as client:
+        yield client
+
+@pytest.fixture(scope="module")
+async def ingested_repo(client):
+    """Ingest the project repository once, then delete it after the module."""
     payload = {
         "source": "github",
         "url": "https://github.com/alakhanpal23/CodeBase-QA-Agent",
-        "repo_id": "test-deployment-repo",
+        "repo_id": REPO_ID,
         "include_globs": ["**/*.py", "**/*.md", "**/*.js", "**/*.ts"],
         "exclude_globs": [".git/**", "node_modules/**", "__pycache__/**"]
     }
     
-    try:
-        print("📥 Starting ingestion (this may take a while)...")
-        response = requests.post(
-            f"{API_BASE}/ingest",
-            json=payload,
-            timeout=120  # 2 minutes timeout
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Ingestion successful:")
-            print(f"   - Files processed: {data.get('files_processed', 0)}")
-            print(f"   - Chunks stored: {data.get('chunks_stored', 0)}")
-            print(f"   - Time taken: {data.get('elapsed_time', 0):.2f}s")
-            return data
-        else:
-            print(f"❌ Ingestion failed: {response.status_code}")
-            print(f"   Response: {response.text}")
-            return None
-    except Exception as e:
-        print(f"❌ Ingestion error: {e}")
-        return None
-
-def test_query():
-    """Test querying the codebase."""
-    print("\n🔍 Testing codebase query...")
+    response = await client.post("/ingest", json=payload, timeout=120)  # 2 minutes timeout
+    assert response.status_code == 200, f"Ingestion failed: {response.text}"
     
-    payload = {
-        "question": "How does the FastAPI application work? Show me the main endpoints.",
-        "repo_ids": ["test-deployment-repo"],
-        "k": 5
-    }
+    data = _loads(response.content)
+    assert data.get("chunks_stored", 0) > 0
     
-    try:
-        print("🤔 Sending query...")
-        response = requests.post(
-            f"{API_BASE}/query",
-            json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Query successful:")
-            print(f"   - Answer length: {len(data.get('answer', ''))}")
-            print(f"   - Citations: {len(data.get('citations', []))}")
-            print(f"   - Snippets: {len(data.get('snippets', []))}")
-            print(f"   - Latency: {data.get('latency_ms', 0)}ms")
-            print(f"   - Mode: {data.get('mode', 'unknown')}")
-            
-            # Show first part of answer
-            answer = data.get('answer', '')
-            if answer:
-                preview = answer[:200] + "..." if len(answer) > 200 else answer
-                print(f"   - Answer preview: {preview}")
-            
-            return data
-        else:
-            print(f"❌ Query failed: {response.status_code}")
-            print(f"   Response: {response.text}")
-            return None
-    except Exception as e:
-        print(f"❌ Query error: {e}")
-        return None
-
-def test_delete_repo():
-    """Test repository deletion."""
-    print("\n🔍 Testing repository deletion...")
+    yield REPO_ID
     
-    try:
-        response = requests.delete(f"{API_BASE}/repos/test-deployment-repo", timeout=30)
-        
-        if response.status_code == 200:
-            print("✅ Repository deleted successfully")
-            return True
-        else:
-            print(f"❌ Deletion failed: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ Deletion error: {e}")
-        return False
+    response = await client.delete(f"/repos/{REPO_ID}", timeout=30)
+    assert response.status_code == 200, f"Deletion failed: {response.status_code}"
 
-def main():
-    """Run all tests."""
-    print("🚀 Starting CodeBase QA Agent Deployment Tests")
-    print("=" * 50)
+async def test_health_and_repos_list(client):
+    """Test the health and repositories list endpoints concurrently."""
+    health, repos = await asyncio.gather(
+        client.get("/health", timeout=5),
+        client.get("/repos", timeout=10)
+    )
     
-    # Test sequence
-    tests_passed = 0
-    total_tests = 5
+    assert health.status_code == 200
+    assert _loads(health.content)["ok"] is True
     
-    # 1. Health check
-    if test_health():
-        tests_passed += 1
-    
-    # 2. List repositories
-    repos = test_repos_list()
-    if repos is not None:
-        tests_passed += 1
+    assert repos.status_code == 200
+    assert isinstance(_loads(repos.content), list)
+
+async def test_ingested_repo_is_listed(client, ingested_repo):
+    """Test that the ingested repository shows up in the repositories list."""
+    response = await client.get("/repos", timeout=10)
     
-    # 3. Ingest repository
-    ingest_result = test_ingest_repo()
-    if ingest_result:
-        tests_passed += 1
-        
-        # 4. Query repository
-        query_result = test_query()
-        if query_result:
-            tests_passed += 1
-        
-        # 5. Delete repository
-        if test_delete_repo():
-            tests_passed += 1
-    else:
-        print("⏭️  Skipping query and deletion tests due to ingestion failure")
+    assert response.status_code == 200
+    assert any(repo.get("repo_id") == ingested_repo for repo in _loads(response.content))
+
+@pytest.mark.parametrize("question,expected_min_citations", [
+    ("How does the FastAPI application work? Show me the main endpoints.", 1),
+    ("Where are code snippets extracted for citations?", 1),
+])
+async def test_query(client, ingested_repo, question, expected_min_citations):
+    """Test querying the ingested codebase."""
+    payload = {
+        "question": question,
+        "repo_ids": [ingested_repo],
+        "k": 5
+    }
     
-    # Summary
-    print("\n" + "=" * 50)
-    print(f"🎯 Test Results: {tests_passed}/{total_tests} tests passed")
+    response = await client.post("/query", json=payload, timeout=30)
+    assert response.status_code == 200, f"Query failed: {response.text}"
     
-    if tests_passed == total_tests:
-        print("🎉 All tests passed! System is ready for deployment.")
-        return 0
-    else:
-        print("⚠️  Some tests failed. Please check the issues above.")
-        return 1
+    data = _loads(response.content)
+    assert data.get("answer")
+    assert len(data.get("citations", [])) >= expected_min_citations
+    assert "latency_ms" in data
 
 if __name__ == "__main__":
-    exit_code = main()
-    sys.exit(exit_code)
\ No newline at end of file
+    raise SystemExit(pytest.main([__file__, "-v"]))
@@ -1,25 +1,21 @@
 #!/usr/bin/env python3
 """
 Quick test script for snippet functionality.
+
+Run with pytest, or directly with `python test_snippets.py`. The API test
+is skipped when no server is running on localhost:8000.
 """
 
-import os
-import sys
-import tempfile
-import json
+import pytest
 import requests
 
-# Add backend to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
-
 from backend.app.services.snippets import extract_snippet
 from backend.app.core.config import settings
 
-def test_snippet_extraction():
-    """Test snippet extraction with a sample file."""
-    
-    # Create a temporary test file
-    test_content = """# Sample Python file
+API_BASE = "http://localhost:8000"
+
+# Sample source written into the shared test repository
+SAMPLE_CONTENT = """# Sample Python file
 import os
 import sys
 
@@ -42,52 +38,47 @@ class TestClass:
 if __name__ == "__main__":
     hello_world()
 """
-    
-    # Create temp directory structure
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Override settings for test
-        original_repos_dir = settings.repos_dir
-        settings.repos_dir = temp_dir
-        
-        # Create repo directory and file
-        repo_dir = os.path.join(temp_dir, "test-repo")
-        os.makedirs(repo_dir, exist_ok=True)
-        
-        test_file = os.path.join(repo_dir, "sample.py")
-        with open(test_file, "w") as f:
-            f.write(test_content)
-        
-        # Test snippet extraction
-        result = extract_snippet(
-            repo_id="test-repo",
-            rel_path="sample.py",
-            start=5,  # hello_world function
-            end=7,
-            context_lines=3
-        )
-        
-        # Restore original setting
-        settings.repos_dir = original_repos_dir
-        
-        if result:
-            window_start, window_end, code = result
-            print("✅ Snippet extraction test passed!")
-            print(f"Window: lines {window_start}-{window_end}")
-            print("Code snippet:")
-            print("=" * 40)
-            print(code)
-            print("=" * 40)
-            return True
-        else:
-            print("❌ Snippet extraction test failed!")
-            return False
 
-def test_api_with_snippets():
-    """Test the API endpoint to see if snippets are included."""
+# Per-line view of the sample source for exact snippet comparisons
+SAMPLE_LINES = SAMPLE_CONTENT.splitlines()
+
+@pytest.fixture(scope="session")
+def sample_repo(tmp_path_factory):
+    """Provision test-repo/sample.py once for the whole session."""
+    repos_dir = tmp_path_factory.mktemp("repos")
+    repo_dir = repos_dir / "test-repo"
+    repo_dir.mkdir()
+    (repo_dir / "sample.py").write_text(SAMPLE_CONTENT)
+    return repos_dir
+
+@pytest.fixture(scope="module")
+def api_session():
+    """Shared session so repeated API calls reuse one keep-alive connection."""
+    with requests.Session() as session:
+        yield session
+
+def test_snippet_extraction(sample_repo, monkeypatch):
+    """Test snippet extraction with a sample file."""
+    
+    # Point snippet extraction at the shared sample repo for this test only
+    monkeypatch.setattr(settings, "repos_dir", str(sample_repo))
     
-    # This assumes the API is running on localhost:8000
-    url = "http://localhost:8000/query"
+    result = extract_snippet(
+        repo_id="test-repo",
+        rel_path="sample.py",
+        start=5,  # hello_world function
+        end=7,
+        context_lines=3
+    )
     
+    assert result is not None
+    window_start, window_end, code = result
+    assert window_start <= 5 and window_end >= 7
+    assert code.splitlines() == SAMPLE_LINES[window_start - 1:window_end]
+    assert "def hello_world():" in code
+
+def test_api_with_snippets(api_session):
+    """Test the API endpoint to see if snippets are included."""
     payload = {
         "question": "How does authentication work?",
         "repo_ids": ["test-repo"],
@@ -95,50 +86,17 @@ def test_api_with_snippets():
     }
     
     try:
-        response = requests.post(url, json=payload, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            
-            print("✅ API test passed!")
-            print(f"Answer: {data.get('answer', 'No answer')}")
-            print(f"Citations: {len(data.get('citations', []))}")
-            print(f"Snippets: {len(data.get('snippets', []))}")
-            
-            # Show first snippet if available
-            snippets = data.get('snippets', [])
-            if snippets:
-                snippet = snippets[0]
-                print("\nFirst snippet:")
-                print(f"Path: {snippet['path']}")
-                print(f"Lines: {snippet['start']}-{snippet['end']} (window: {snippet['window_start']}-{snippet['window_end']})")
-                print("Code:")
-                print(snippet['code'][:200] + "..." if len(snippet['code']) > 200 else snippet['code'])
-            
-            return True
-        else:
-            print(f"❌ API test failed with status {response.status_code}")
-            print(f"Response: {response.text}")
-            return False
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ API test failed: {e}")
-        print("Make sure the API server is running on localhost:8000")
-        return False
-
-if __name__ == "__main__":
-    print("Testing snippet extraction functionality...\n")
-    
-    # Test 1: Direct snippet extraction
-    print("Test 1: Direct snippet extraction")
-    test1_passed = test_snippet_extraction()
-    
-    print("\n" + "="*50 + "\n")
+        response = api_session.post(f"{API_BASE}/query", json=payload, timeout=10)
+    except requests.exceptions.ConnectionError:
+        pytest.skip(f"API server is not running on {API_BASE}")
     
-    # Test 2: API integration
-    print("Test 2: API integration (requires running server)")
-    test2_passed = test_api_with_snippets()
+    assert response.status_code == 200, f"API test failed: {response.text}"
     
-    print("\n" + "="*50)
-    print("Summary:")
-    print(f"Direct extraction: {'✅ PASS' if test1_passed else '❌ FAIL'}")
-    print(f"API integration: {'✅ PASS' if test2_passed else '❌ FAIL'}")
\ No newline at end of file
+    data = response.json()
+    assert "answer" in data
+    for snippet in data.get("snippets", []):
+        assert snippet["window_start"] <= snippet["start"] <= snippet["end"] <= snippet["window_end"]
+        assert snippet["code"]
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-v"]))
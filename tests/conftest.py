@@ -0,0 +1,55 @@
+"""
+Shared pytest configuration for the test suite.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Test modules import both ``backend.app`` (repo root) and ``app`` (backend dir)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT_DIR, "backend")
+
+for _path in (BACKEND_DIR, ROOT_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+# RAM-backed filesystem used for scratch files when the platform provides one
+TMPFS_DIR = "/dev/shm"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def tmpfs_tempdir():
+    """Point tempfile (and pytest's tmp_path) at tmpfs when available."""
+    if not (os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK)):
+        yield tempfile.gettempdir()
+        return
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("TMPDIR", TMPFS_DIR)
+        mp.setattr(tempfile, "tempdir", TMPFS_DIR)
+        yield TMPFS_DIR
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Import the FastAPI app only when a test first needs it."""
+    from app.main import app as fastapi_app
+    
+    # Generate the OpenAPI schema once; FastAPI serves the cached dict afterwards
+    fastapi_app.openapi()
+    return fastapi_app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """Share one FastAPI test client across the whole session."""
+    from fastapi.testclient import TestClient
+    
+    # Not entered as a context manager: the smoke tests exercise the app
+    # without running the startup handlers
+    test_client = TestClient(app)
+    yield test_client
+    test_client.close()
@@ -3,16 +3,12 @@ Integration tests for API endpoints with snippet functionality.
 """
 
 import os
-import sys
 import tempfile
 import json
 import asyncio
 from unittest.mock import patch, MagicMock
 import pytest
 
-# Add backend to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
 from fastapi.testclient import TestClient
 from backend.app.main import app
 from backend.app.core.config import settings
@@ -24,7 +20,8 @@ class TestAPIIntegration:
     def setup_method(self):
         """Setup test environment."""
         self.client = TestClient(app)
-        self.temp_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
         self.original_repos_dir = settings.repos_dir
         settings.repos_dir = self.temp_dir
         
@@ -38,8 +35,7 @@ class TestAPIIntegration:
     def teardown_method(self):
         """Cleanup test environment."""
         settings.repos_dir = self.original_repos_dir
-        import shutil
-        shutil.rmtree(self.temp_dir)
+        self._tmp.cleanup()
     
     def create_sample_files(self):
         """Create sample files for testing."""
@@ -279,15 +275,15 @@ class TestSnippetAPIBehavior:
     
     def setup_method(self):
         """Setup test environment."""
-        self.temp_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
         self.original_repos_dir = settings.repos_dir
         settings.repos_dir = self.temp_dir
     
     def teardown_method(self):
         """Cleanup test environment."""
         settings.repos_dir = self.original_repos_dir
-        import shutil
-        shutil.rmtree(self.temp_dir)
+        self._tmp.cleanup()
     
     def test_snippet_response_structure(self):
         """Test that snippet responses have correct structure."""
@@ -438,73 +434,71 @@ class TestPerformanceAndScaling:
         import time
         from backend.app.services.snippets import extract_snippet
         
-        temp_dir = tempfile.mkdtemp()
         original_repos_dir = settings.repos_dir
-        settings.repos_dir = temp_dir
         
-        try:
-            # Create test repo
-            repo_dir = os.path.join(temp_dir, "perf-repo")
-            os.makedirs(repo_dir, exist_ok=True)
-            
-            # Create medium-sized file
-            content = "\n".join([f"def function_{i}():\n    return {i}\n" for i in range(1000)])
-            
-            with open(os.path.join(repo_dir, "functions.py"), "w") as f:
-                f.write(content)
-            
-            # Time multiple extractions
-            start_time = time.time()
-            
-            for i in range(10):
-                result = extract_snippet("perf-repo", "functions.py", i*10 + 1, i*10 + 5)
-                assert result is not None
-            
-            elapsed = time.time() - start_time
-            
-            # Should be reasonably fast (less than 1 second for 10 extractions)
-            assert elapsed < 1.0
+        with tempfile.TemporaryDirectory() as temp_dir:
+            settings.repos_dir = temp_dir
             
-        finally:
-            settings.repos_dir = original_repos_dir
-            import shutil
-            shutil.rmtree(temp_dir)
+            try:
+                # Create test repo
+                repo_dir = os.path.join(temp_dir, "perf-repo")
+                os.makedirs(repo_dir, exist_ok=True)
+                
+                # Create medium-sized file
+                content = "\n".join([f"def function_{i}():\n    return {i}\n" for i in range(1000)])
+                
+                with open(os.path.join(repo_dir, "functions.py"), "w") as f:
+                    f.write(content)
+                
+                # Time multiple extractions
+                start_time = time.perf_counter_ns()
+                
+                for i in range(10):
+                    result = extract_snippet("perf-repo", "functions.py", i*10 + 1, i*10 + 5)
+                    assert result is not None
+                
+                elapsed = (time.perf_counter_ns() - start_time) / 1e9
+                
+                # Should be reasonably fast (less than 1 second for 10 extractions)
+                assert elapsed < 1.0
+                
+            finally:
+                settings.repos_dir = original_repos_dir
     
     def test_concurrent_snippet_extraction(self):
         """Test concurrent snippet extraction."""
         import concurrent.futures
         from backend.app.services.snippets import extract_snippet
         
-        temp_dir = tempfile.mkdtemp()
         original_repos_dir = settings.repos_dir
-        settings.repos_dir = temp_dir
         
-        try:
-            # Create test repo
-            repo_dir = os.path.join(temp_dir, "concurrent-repo")
-            os.makedirs(repo_dir, exist_ok=True)
-            
-            # Create multiple files
-            for i in range(5):
-                content = f"# File {i}\n" + "\n".join([f"def func_{j}(): return {j}" for j in range(100)])
-                with open(os.path.join(repo_dir, f"file_{i}.py"), "w") as f:
-                    f.write(content)
-            
-            # Test concurrent extraction
-            def extract_worker(file_num):
-                return extract_snippet("concurrent-repo", f"file_{file_num}.py", 10, 15)
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                futures = [executor.submit(extract_worker, i) for i in range(5)]
-                results = [future.result() for future in concurrent.futures.as_completed(futures)]
-            
-            # All extractions should succeed
-            assert all(result is not None for result in results)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            settings.repos_dir = temp_dir
             
-        finally:
-            settings.repos_dir = original_repos_dir
-            import shutil
-            shutil.rmtree(temp_dir)
+            try:
+                # Create test repo
+                repo_dir = os.path.join(temp_dir, "concurrent-repo")
+                os.makedirs(repo_dir, exist_ok=True)
+                
+                # Create multiple files
+                for i in range(5):
+                    content = f"# File {i}\n" + "\n".join([f"def func_{j}(): return {j}" for j in range(100)])
+                    with open(os.path.join(repo_dir, f"file_{i}.py"), "w") as f:
+                        f.write(content)
+                
+                # Test concurrent extraction
+                def extract_worker(file_num):
+                    return extract_snippet("concurrent-repo", f"file_{file_num}.py", 10, 15)
+                
+                with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+                    futures = [executor.submit(extract_worker, i) for i in range(5)]
+                    results = [future.result() for future in concurrent.futures.as_completed(futures)]
+                
+                # All extractions should succeed
+                assert all(result is not None for result in results)
+                
+            finally:
+                settings.repos_dir = original_repos_dir
 
 
 if __name__ == "__main__":
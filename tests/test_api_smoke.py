@@ -6,24 +6,11 @@ import pytest
 import asyncio
 import tempfile
 import os
-from pathlib import Path
-from fastapi.testclient import TestClient
-
-# Add the backend directory to the Python path
-import sys
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
-
-from app.main import app
 
 
 class TestAPISmoke:
     """Smoke tests for API endpoints."""
     
-    @pytest.fixture
-    def client(self):
-        """Create a test client."""
-        return TestClient(app)
-    
     def test_health_endpoint(self, client):
         """Test health check endpoint."""
         response = client.get("/health")
@@ -171,11 +158,6 @@ class TestAPISchemas:
 class TestAPIErrorHandling:
     """Test API error handling."""
     
-    @pytest.fixture
-    def client(self):
-        """Create a test client."""
-        return TestClient(app)
-    
     def test_404_endpoint(self, client):
         """Test 404 handling."""
         response = client.get("/nonexistent")
@@ -5,13 +5,11 @@ Tests for code chunking functionality.
 import pytest
 import tempfile
 import os
-from pathlib import Path
+import pickle
 
-# Add the backend directory to the Python path
-import sys
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
-
-from app.core.chunking import chunk_file, is_text_file, should_skip_file, CodeChunk
+from app.core.chunking import (
+    chunk_file, chunk_file_batched, is_text_file, should_skip_file, should_skip_dir, CodeChunk
+)
 
 
 class TestChunking:
@@ -99,6 +97,25 @@ def test_function():
             assert chunk.end_line >= chunk.start_line
             assert chunk.content_hash is not None
             assert len(chunk.content_hash) > 0
+            
+            # Hash depends only on content, not on how the chunk was built
+            rebuilt = CodeChunk(
+                path="other.py",
+                content=chunk.content,
+                start_line=1,
+                end_line=1,
+                content_hash=""
+            )
+            assert rebuilt.content_hash == chunk.content_hash
+    
+    def test_chunk_file_returns_fresh_chunks(self):
+        """Test that chunking the same file twice never shares chunk objects."""
+        code = "\n".join([f"value_{i} = {i}" for i in range(200)])
+        
+        first = chunk_file("fresh.py", code)
+        second = chunk_file("fresh.py", code)
+        assert first == second
+        assert all(a is not b for a, b in zip(first, second))
     
     def test_language_detection(self):
         """Test language detection from file extensions."""
@@ -136,6 +153,17 @@ class TestFileFiltering:
         assert not is_text_file("test.exe", b"\x00\x01\x02\x03")
         assert not is_text_file("test.png", b"\x89PNG\r\n\x1a\n")
         assert not is_text_file("test.jpg", b"\xff\xd8\xff")
+        
+        # Binary signatures are caught even without a null byte in the sample
+        assert not is_text_file("logo", b"GIF89a" + b"\x01" * 10)
+        assert not is_text_file("archive", b"PK\x03\x04" + b"\x14" * 10)
+        
+        # Unknown extensions are sniffed, including a character cut at the sample end
+        assert is_text_file("Makefile", b"all:\n\techo hi\n")
+        assert is_text_file("NOTES", b"a" * 4095 + "\u00e9".encode())
+        
+        # Text that happens to start like a binary header is still text
+        assert is_text_file("NOTES", b"MZ ranks first in the list\n")
     
     def test_should_skip_file(self):
         """Test file skipping logic."""
@@ -152,6 +180,35 @@ class TestFileFiltering:
         assert not should_skip_file("app.js", 100)
         assert not should_skip_file("README.md", 100)
         assert not should_skip_file("config.json", 100)
+    
+    def test_should_skip_dir(self):
+        """Test directory pruning used during repository traversal."""
+        assert should_skip_dir(".git")
+        assert should_skip_dir("node_modules")
+        assert should_skip_dir("Node_Modules")
+        assert should_skip_dir("__pycache__")
+        assert should_skip_dir(".github")
+        
+        assert not should_skip_dir("src")
+        assert not should_skip_dir("tests")
+        
+        # Anything pruned here would also be rejected file by file
+        for name in ("node_modules", ".git", "dist"):
+            assert should_skip_file(os.path.join(name, "index.js"), 100)
+    
+    def test_chunk_file_batched(self):
+        """Test that the batched view matches the chunk list."""
+        content = "\n".join(f"line_{i} = {i}" for i in range(500))
+        
+        chunks = chunk_file("test.py", content, max_chunk_size=100)
+        batch = chunk_file_batched("test.py", content, max_chunk_size=100)
+        
+        assert len(batch) == len(chunks)
+        assert batch.contents == [chunk.content for chunk in chunks]
+        assert batch.start_lines.dtype == "int32"
+        assert batch.start_lines.tolist() == [chunk.start_line for chunk in chunks]
+        assert batch.end_lines.tolist() == [chunk.end_line for chunk in chunks]
+        assert list(batch.iter_chunks()) == chunks
 
 
 class TestCodeChunk:
@@ -210,6 +267,15 @@ class TestCodeChunk:
         assert chunk_dict["language"] == "python"
         assert chunk_dict["chunk_type"] == "function"
         assert chunk_dict["content_hash"] == chunk.content_hash
+    
+    def test_chunk_uses_slots(self):
+        """Test that chunks carry no per-instance dict and still pickle."""
+        chunk = CodeChunk("test.py", "test content", 1, 1, "")
+        
+        assert not hasattr(chunk, "__dict__")
+        
+        restored = pickle.loads(pickle.dumps(chunk))
+        assert restored == chunk
 
 
 if __name__ == "__main__":
@@ -2,45 +2,54 @@
 """
 Frontend End-to-End Tests using Selenium
 Tests the complete user journey through the web interface
+
+The tests are independent, so they are spread over several xdist workers,
+each with its own browser. Run with pytest, or directly with
+`python tests/test_frontend_e2e.py`.
 """
 
-import time
-import sys
-import os
+import pytest
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 
 FRONTEND_URL = "http://localhost:3001"
 
-class FrontendTestResults:
-    def __init__(self):
-        self.passed = 0
-        self.failed = 0
-        self.errors = []
-    
-    def add_pass(self, test_name: str):
-        self.passed += 1
-        print(f"✅ {test_name}")
-    
-    def add_fail(self, test_name: str, error: str):
-        self.failed += 1
-        self.errors.append(f"{test_name}: {error}")
-        print(f"❌ {test_name}: {error}")
-    
-    def summary(self):
-        total = self.passed + self.failed
-        print(f"\n{'='*60}")
-        print(f"FRONTEND TEST SUMMARY: {self.passed}/{total} tests passed")
-        if self.failed > 0:
-            print(f"❌ {self.failed} tests failed:")
-            for error in self.errors:
-                print(f"   - {error}")
-        print(f"{'='*60}")
-        return self.failed == 0
+# Browser size every test starts from
+DEFAULT_WINDOW_SIZE = (1920, 1080)
+
+# Headless Chromes run side by side when the file is run directly
+PARALLEL_WORKERS = 3
+
+# Requests the browser never makes during the tests
+BLOCKED_URLS = [
+    "*.google-analytics.com/*",
+    "*.googletagmanager.com/*",
+    "*fonts.googleapis.com/*",
+    "*fonts.gstatic.com/*",
+    "*.hotjar.com/*"
+]
+
+# Counts the accessibility audit needs, collected in a single script call
+ACCESSIBILITY_AUDIT_SCRIPT = """
+const images = Array.from(document.querySelectorAll('img'));
+const inputs = Array.from(document.querySelectorAll('input'));
+const labelTargets = new Set(
+    Array.from(document.querySelectorAll('label[for]')).map(l => l.htmlFor)
+);
+return {
+    imgTotal: images.length,
+    imgWithAlt: images.filter(img => img.getAttribute('alt')).length,
+    headingCount: document.querySelectorAll('h1, h2, h3, h4, h5, h6').length,
+    inputTotal: inputs.length,
+    labeledInputCount: inputs.filter(i =>
+        (i.id && labelTargets.has(i.id)) || i.getAttribute('aria-label') || i.placeholder
+    ).length
+};
+"""
 
 def setup_driver():
     """Setup Chrome WebDriver with appropriate options"""
@@ -50,313 +59,205 @@ def setup_driver():
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument("--window-size={},{}".format(*DEFAULT_WINDOW_SIZE))
+        chrome_options.add_argument("--disable-features=Translate,MediaRouter")
+        # Tests only check alt text in the DOM, never rendered images
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        # Return from driver.get at DOMContentLoaded; tests wait for what they need
+        chrome_options.set_capability("pageLoadStrategy", "eager")
         
         driver = webdriver.Chrome(options=chrome_options)
-        driver.implicitly_wait(10)
+        # Third-party analytics and font requests are not under test
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        # No implicit wait: tests wait explicitly, and absence checks return at once
+        driver.implicitly_wait(0)
         return driver
     except Exception as e:
         print(f"❌ Failed to setup WebDriver: {e}")
         print("💡 Make sure Chrome and ChromeDriver are installed")
         return None
 
-def test_homepage_load(driver, results):
+@pytest.fixture(scope="session")
+def driver():
+    """One browser per xdist worker, shared by the tests it runs"""
+    driver = setup_driver()
+    if driver is None:
+        # An error, not a skip: a missing browser must not pass the suite
+        pytest.fail("Chrome WebDriver is not available", pytrace=False)
+    yield driver
+    driver.quit()
+
+def wait(driver, timeout=5):
+    """Explicit wait polling every 100 ms instead of Selenium's default 500 ms"""
+    return WebDriverWait(driver, timeout, poll_frequency=0.1)
+
+def test_homepage_load(driver):
     """Test homepage loading and basic elements"""
-    try:
-        driver.get(FRONTEND_URL)
-        
-        # Check if page title contains expected text
-        WebDriverWait(driver, 10).until(
-            lambda d: "CodeBase QA" in d.title or len(d.title) > 0
-        )
-        
-        # Check for main heading
-        heading = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "h1"))
-        )
-        
-        if "CodeBase QA" in heading.text or "Ask Questions" in heading.text:
-            results.add_pass("Homepage Load")
-        else:
-            results.add_fail("Homepage Load", "Main heading not found or incorrect")
-            
-    except TimeoutException:
-        results.add_fail("Homepage Load", "Page load timeout")
-    except Exception as e:
-        results.add_fail("Homepage Load", str(e))
+    driver.get(FRONTEND_URL)
+    
+    # Check if page title contains expected text
+    wait(driver).until(
+        lambda d: "CodeBase QA" in d.title or len(d.title) > 0
+    )
+    
+    # Check for main heading
+    heading = wait(driver).until(
+        EC.presence_of_element_located((By.TAG_NAME, "h1"))
+    )
+    
+    assert "CodeBase QA" in heading.text or "Ask Questions" in heading.text, \
+        "Main heading not found or incorrect"
 
-def test_navigation_links(driver, results):
+def test_navigation_links(driver):
     """Test navigation between pages"""
-    try:
-        driver.get(FRONTEND_URL)
-        
-        # Test navigation to repositories page
-        repos_link = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Repositories"))
-        )
-        repos_link.click()
-        
-        # Wait for repositories page to load
-        WebDriverWait(driver, 10).until(
-            lambda d: "/repos" in d.current_url
-        )
-        
-        # Check for repositories page content
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.TEXT, "Repository Management"))
-        )
-        
-        results.add_pass("Navigation to Repositories")
-        
-        # Test navigation to chat page
-        driver.get(FRONTEND_URL)
-        chat_link = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Chat"))
-        )
-        chat_link.click()
-        
-        WebDriverWait(driver, 10).until(
-            lambda d: "/chat" in d.current_url
-        )
-        
-        results.add_pass("Navigation to Chat")
-        
-    except TimeoutException:
-        results.add_fail("Navigation Links", "Navigation timeout")
-    except Exception as e:
-        results.add_fail("Navigation Links", str(e))
+    driver.get(FRONTEND_URL)
+    
+    # Test navigation to repositories page
+    repos_link = wait(driver).until(
+        EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Repositories"))
+    )
+    repos_link.click()
+    
+    # Wait for repositories page to load
+    wait(driver).until(
+        lambda d: "/repos" in d.current_url
+    )
+    
+    # Check for repositories page content
+    wait(driver).until(
+        EC.presence_of_element_located((By.XPATH, "//*[contains(normalize-space(.), 'Repository Management')]"))
+    )
+    
+    # Test navigation to chat page
+    driver.get(FRONTEND_URL)
+    chat_link = wait(driver).until(
+        EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, "Chat"))
+    )
+    chat_link.click()
+    
+    wait(driver).until(
+        lambda d: "/chat" in d.current_url
+    )
 
-def test_repository_form(driver, results):
+def test_repository_form(driver):
     """Test repository addition form"""
-    try:
-        driver.get(f"{FRONTEND_URL}/repos")
-        
-        # Find the repository URL input
-        url_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='url']"))
-        )
-        
-        # Test form validation with invalid URL
-        url_input.clear()
-        url_input.send_keys("invalid-url")
-        
-        submit_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-        submit_button.click()
-        
-        # Browser should show validation error
-        if url_input.get_attribute("validity").get("valid") == False:
-            results.add_pass("Repository Form Validation")
-        else:
-            results.add_fail("Repository Form Validation", "Invalid URL not caught")
-        
-        # Test with valid URL (but don't actually submit to avoid long wait)
-        url_input.clear()
-        url_input.send_keys("https://github.com/test/repo")
-        
-        if url_input.get_attribute("validity").get("valid") != False:
-            results.add_pass("Repository Form Valid Input")
-        else:
-            results.add_fail("Repository Form Valid Input", "Valid URL rejected")
-            
-    except TimeoutException:
-        results.add_fail("Repository Form", "Form elements not found")
-    except Exception as e:
-        results.add_fail("Repository Form", str(e))
+    driver.get(f"{FRONTEND_URL}/repos")
+    
+    # Find the repository URL input
+    url_input = wait(driver).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='url']"))
+    )
+    
+    # Test form validation with invalid URL
+    url_input.clear()
+    url_input.send_keys("invalid-url")
+    
+    submit_button = wait(driver, 2).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "button[type='submit']"))
+    )
+    submit_button.click()
+    
+    # Browser should show validation error
+    assert url_input.get_attribute("validity").get("valid") == False, "Invalid URL not caught"
+    
+    # Test with valid URL (but don't actually submit to avoid long wait)
+    url_input.clear()
+    url_input.send_keys("https://github.com/test/repo")
+    
+    assert url_input.get_attribute("validity").get("valid") != False, "Valid URL rejected"
 
-def test_chat_interface(driver, results):
+def test_chat_interface(driver):
     """Test chat interface elements"""
-    try:
-        driver.get(f"{FRONTEND_URL}/chat")
-        
-        # Check for chat input
-        chat_input = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='question']"))
-        )
-        
-        # Check for send button
-        send_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-        
-        # Test that input is initially disabled (no repos selected)
-        if chat_input.get_attribute("disabled"):
-            results.add_pass("Chat Input Disabled (No Repos)")
-        else:
-            results.add_fail("Chat Input Disabled (No Repos)", "Input should be disabled when no repos selected")
-        
-        # Check for repository selector
-        try:
-            repo_selector = driver.find_element(By.TEXT, "Repositories")
-            results.add_pass("Chat Repository Selector")
-        except NoSuchElementException:
-            results.add_fail("Chat Repository Selector", "Repository selector not found")
-        
-        # Check for welcome message
-        try:
-            welcome_text = driver.find_element(By.TEXT, "Welcome")
-            results.add_pass("Chat Welcome Message")
-        except NoSuchElementException:
-            results.add_fail("Chat Welcome Message", "Welcome message not found")
-            
-    except TimeoutException:
-        results.add_fail("Chat Interface", "Chat elements not found")
-    except Exception as e:
-        results.add_fail("Chat Interface", str(e))
+    driver.get(f"{FRONTEND_URL}/chat")
+    
+    # Check for chat input
+    chat_input = wait(driver).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='question']"))
+    )
+    
+    # Check for send button
+    wait(driver, 2).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "button[type='submit']"))
+    )
+    
+    # Test that input is initially disabled (no repos selected)
+    assert chat_input.get_attribute("disabled"), "Input should be disabled when no repos selected"
+    
+    # Check for the repository selector and welcome message in one round-trip
+    page_text = driver.execute_script(
+        "const text = document.body.innerText;"
+        "return {repos: text.includes('Repositories'), welcome: text.includes('Welcome')}"
+    )
+    assert page_text["repos"], "Repository selector not found"
+    assert page_text["welcome"], "Welcome message not found"
 
-def test_responsive_design(driver, results):
+@pytest.mark.parametrize("width,height,device", [
+    (1920, 1080, "Desktop"),
+    (768, 1024, "Tablet"),
+    (375, 667, "Mobile")
+])
+def test_responsive_design(driver, width, height, device):
     """Test responsive design at different screen sizes"""
-    screen_sizes = [
-        (1920, 1080, "Desktop"),
-        (768, 1024, "Tablet"),
-        (375, 667, "Mobile")
-    ]
+    driver.get(FRONTEND_URL)
     
-    for width, height, device in screen_sizes:
-        try:
-            driver.set_window_size(width, height)
-            driver.get(FRONTEND_URL)
-            
-            # Wait for page to load
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "h1"))
-            )
-            
-            # Check if main content is visible
-            main_content = driver.find_element(By.TAG_NAME, "main")
-            if main_content.is_displayed():
-                results.add_pass(f"Responsive Design - {device}")
-            else:
-                results.add_fail(f"Responsive Design - {device}", "Main content not visible")
-                
-        except Exception as e:
-            results.add_fail(f"Responsive Design - {device}", str(e))
-
-def test_accessibility_basics(driver, results):
-    """Test basic accessibility features"""
-    try:
-        driver.get(FRONTEND_URL)
-        
-        # Check for alt text on images
-        images = driver.find_elements(By.TAG_NAME, "img")
-        images_with_alt = [img for img in images if img.get_attribute("alt")]
-        
-        if len(images) == 0 or len(images_with_alt) == len(images):
-            results.add_pass("Image Alt Text")
-        else:
-            results.add_fail("Image Alt Text", f"{len(images) - len(images_with_alt)} images missing alt text")
-        
-        # Check for proper heading hierarchy
-        headings = driver.find_elements(By.CSS_SELECTOR, "h1, h2, h3, h4, h5, h6")
-        if len(headings) > 0:
-            results.add_pass("Heading Structure")
-        else:
-            results.add_fail("Heading Structure", "No headings found")
-        
-        # Check for form labels
-        inputs = driver.find_elements(By.TAG_NAME, "input")
-        labeled_inputs = []
-        for input_elem in inputs:
-            input_id = input_elem.get_attribute("id")
-            if input_id:
-                try:
-                    driver.find_element(By.CSS_SELECTOR, f"label[for='{input_id}']")
-                    labeled_inputs.append(input_elem)
-                except NoSuchElementException:
-                    pass
-            # Also check for aria-label or placeholder
-            if (input_elem.get_attribute("aria-label") or 
-                input_elem.get_attribute("placeholder")):
-                labeled_inputs.append(input_elem)
-        
-        if len(inputs) == 0 or len(labeled_inputs) >= len(inputs) * 0.8:  # 80% threshold
-            results.add_pass("Form Labels")
-        else:
-            results.add_fail("Form Labels", "Some form inputs lack proper labels")
-            
-    except Exception as e:
-        results.add_fail("Accessibility Basics", str(e))
-
-def test_error_states(driver, results):
-    """Test error state handling in UI"""
     try:
-        # Test with backend potentially down
-        driver.get(f"{FRONTEND_URL}/repos")
-        
-        # Wait for page to load
-        time.sleep(3)
-        
-        # Look for error messages or loading states
-        error_elements = driver.find_elements(By.CSS_SELECTOR, "[class*='error'], [class*='Error']")
-        loading_elements = driver.find_elements(By.CSS_SELECTOR, "[class*='loading'], [class*='Loading']")
+        driver.set_window_size(width, height)
         
-        # The page should handle errors gracefully
-        if len(error_elements) > 0 or len(loading_elements) > 0:
-            results.add_pass("Error State Handling")
-        else:
-            # If no explicit error/loading states, check if page still functions
-            try:
-                driver.find_element(By.CSS_SELECTOR, "input[type='url']")
-                results.add_pass("Error State Handling (Graceful Degradation)")
-            except NoSuchElementException:
-                results.add_fail("Error State Handling", "Page broken when backend unavailable")
-                
-    except Exception as e:
-        results.add_fail("Error State Handling", str(e))
+        # Check if main content is visible
+        wait(driver).until(
+            EC.visibility_of_element_located((By.TAG_NAME, "main"))
+        )
+    except TimeoutException:
+        pytest.fail(f"Main content not visible on {device}")
+    finally:
+        # Later tests on this worker share the browser
+        driver.set_window_size(*DEFAULT_WINDOW_SIZE)
 
-def main():
-    """Run all frontend tests"""
-    print("🌐 Starting Frontend End-to-End Tests")
-    print("=" * 60)
+def test_accessibility_basics(driver):
+    """Test basic accessibility features"""
+    driver.get(FRONTEND_URL)
     
-    results = FrontendTestResults()
+    # Run the whole audit in the page: one WebDriver round-trip in total
+    audit = driver.execute_script(ACCESSIBILITY_AUDIT_SCRIPT)
     
-    # Setup WebDriver
-    driver = setup_driver()
-    if not driver:
-        print("❌ Cannot run frontend tests without WebDriver")
-        return 1
+    # Check for alt text on images
+    assert audit["imgWithAlt"] == audit["imgTotal"], \
+        f"{audit['imgTotal'] - audit['imgWithAlt']} images missing alt text"
+    
+    # Check for proper heading hierarchy
+    assert audit["headingCount"] > 0, "No headings found"
+    
+    # Check for form labels (label[for], aria-label or placeholder), 80% threshold
+    assert audit["inputTotal"] == 0 or audit["labeledInputCount"] >= audit["inputTotal"] * 0.8, \
+        "Some form inputs lack proper labels"
+
+def test_error_states(driver):
+    """Test error state handling in UI"""
+    # Test with backend potentially down
+    driver.get(f"{FRONTEND_URL}/repos")
     
+    # Wait until the page shows an error, a loading state or the form itself
     try:
-        # Basic functionality tests
-        print("\n🏠 HOMEPAGE TESTS")
-        test_homepage_load(driver, results)
-        
-        print("\n🧭 NAVIGATION TESTS")
-        test_navigation_links(driver, results)
-        
-        print("\n📝 FORM TESTS")
-        test_repository_form(driver, results)
-        
-        print("\n💬 CHAT INTERFACE TESTS")
-        test_chat_interface(driver, results)
-        
-        print("\n📱 RESPONSIVE DESIGN TESTS")
-        test_responsive_design(driver, results)
-        
-        print("\n♿ ACCESSIBILITY TESTS")
-        test_accessibility_basics(driver, results)
-        
-        print("\n🚨 ERROR HANDLING TESTS")
-        test_error_states(driver, results)
-        
-    finally:
-        driver.quit()
+        wait(driver, 3).until(
+            lambda d: d.find_elements(
+                By.CSS_SELECTOR,
+                "[class*='error'], [class*='Error'], [class*='loading'], [class*='Loading'], input[type='url']"
+            )
+        )
+    except TimeoutException:
+        pass
     
-    # Final summary
-    success = results.summary()
+    # Look for error messages or loading states
+    error_elements = driver.find_elements(By.CSS_SELECTOR, "[class*='error'], [class*='Error']")
+    loading_elements = driver.find_elements(By.CSS_SELECTOR, "[class*='loading'], [class*='Loading']")
     
-    if success:
-        print("\n🎉 ALL FRONTEND TESTS PASSED!")
-        return 0
-    else:
-        print("\n⚠️  Some frontend tests failed.")
-        return 1
+    # The page should handle errors gracefully; without explicit error or
+    # loading states, the form itself must still be there
+    if not error_elements and not loading_elements:
+        assert driver.find_elements(By.CSS_SELECTOR, "input[type='url']"), \
+            "Page broken when backend unavailable"
 
 if __name__ == "__main__":
-    try:
-        exit_code = main()
-        sys.exit(exit_code)
-    except KeyboardInterrupt:
-        print("\n🛑 Tests interrupted by user")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n💥 Unexpected error: {e}")
-        sys.exit(1)
\ No newline at end of file
+    # Spread the independent tests over several browsers, one test at a time
+    raise SystemExit(pytest.main([__file__, "-v", "-n", str(PARALLEL_WORKERS), "--dist=load"]))
@@ -3,14 +3,10 @@ Tests for GPT-4 compatibility and mode switching.
 """
 
 import os
-import sys
 import tempfile
 from unittest.mock import patch, MagicMock, AsyncMock
 import pytest
 
-# Add backend to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
 from backend.app.services.rag import RAGService
 from backend.app.services.query import QueryService
 from backend.app.core.schemas import QueryRequest, Citation
@@ -22,7 +18,8 @@ class TestGPT4Compatibility:
     
     def setup_method(self):
         """Setup test environment."""
-        self.temp_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
         self.original_repos_dir = settings.repos_dir
         settings.repos_dir = self.temp_dir
         
@@ -36,8 +33,7 @@ class TestGPT4Compatibility:
     def teardown_method(self):
         """Cleanup test environment."""
         settings.repos_dir = self.original_repos_dir
-        import shutil
-        shutil.rmtree(self.temp_dir)
+        self._tmp.cleanup()
     
     def create_test_files(self):
         """Create test files for GPT-4 testing."""
@@ -466,15 +462,15 @@ class TestEndToEndGPT4Integration:
     
     def setup_method(self):
         """Setup test environment."""
-        self.temp_dir = tempfile.mkdtemp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.temp_dir = self._tmp.name
         self.original_repos_dir = settings.repos_dir
         settings.repos_dir = self.temp_dir
     
     def teardown_method(self):
         """Cleanup test environment."""
         settings.repos_dir = self.original_repos_dir
-        import shutil
-        shutil.rmtree(self.temp_dir)
+        self._tmp.cleanup()
     
     @patch('backend.app.services.rag.openai.AsyncOpenAI')
     @patch('backend.app.services.query.VectorStoreManager')
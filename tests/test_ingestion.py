@@ -0,0 +1,88 @@
+"""
+Tests for repository file discovery during ingestion.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from app.core.chunking import should_skip_file
+from app.services.ingestion import IngestionService
+
+
+@pytest.fixture
+def repo_tree(tmp_path):
+    """A small repository with nested, skipped and symlinked entries."""
+    files = {
+        "README.md": "# Demo\n",
+        "src/main.py": "print('main')\n",
+        "src/pkg/util.py": "def util(): pass\n",
+        "src/pkg/deep/more/leaf.py": "LEAF = 1\n",
+        "node_modules/lib/index.js": "module.exports = {}\n",
+        ".git/config": "[core]\n",
+        "build/out.py": "generated = True\n",
+        "src/.cache/tmp.py": "cached = True\n",
+    }
+    for rel_path, content in files.items():
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    
+    # A symlinked directory is not descended into; a symlinked file is listed
+    os.symlink(tmp_path / "src", tmp_path / "linked_src", target_is_directory=True)
+    os.symlink(tmp_path / "src" / "main.py", tmp_path / "link.py")
+    
+    return tmp_path
+
+
+def _find_files_rglob(root_path: str):
+    """Relative paths the original Path.rglob-based discovery returned."""
+    found = set()
+    for file_path in Path(root_path).rglob('*'):
+        if not file_path.is_file():
+            continue
+        rel_path = str(file_path.relative_to(root_path))
+        if not should_skip_file(rel_path, file_path.stat().st_size):
+            found.add(rel_path)
+    return found
+
+
+class TestFindFiles:
+    """Test cases for IngestionService file discovery."""
+    
+    @pytest.fixture
+    def service(self):
+        """An IngestionService without vector store or embedding setup."""
+        return IngestionService.__new__(IngestionService)
+    
+    def test_scan_files_prunes_skipped_dirs(self, service, repo_tree):
+        """Test the scandir walk visits nested dirs and prunes skipped ones."""
+        scanned = {rel_path for _, rel_path in service._scan_files(str(repo_tree))}
+        
+        assert "src/pkg/deep/more/leaf.py" in scanned
+        assert "link.py" in scanned
+        assert not any(rel_path.startswith(("node_modules", ".git", "build", "linked_src"))
+                       for rel_path in scanned)
+        assert "src/.cache/tmp.py" not in scanned
+    
+    def test_find_files_matches_rglob(self, service, repo_tree):
+        """Test the scandir walk finds the same files as the rglob walk it replaced."""
+        files = service._find_files(str(repo_tree), ["**/*"], [])
+        found = {os.path.relpath(path, repo_tree) for path in files}
+        
+        assert found == {
+            "README.md",
+            "src/main.py",
+            "src/pkg/util.py",
+            "src/pkg/deep/more/leaf.py",
+            "link.py",
+        }
+        assert found == _find_files_rglob(str(repo_tree))
+    
+    def test_find_files_applies_globs(self, service, repo_tree):
+        """Test include and exclude globs on top of the directory walk."""
+        files = service._find_files(str(repo_tree), ["**/*.py"], ["src/pkg/**"])
+        found = {os.path.relpath(path, repo_tree) for path in files}
+        
+        assert found == {"src/main.py", "link.py"}
@@ -49,20 +49,20 @@ class PerformanceMetrics:
 
 def make_health_request() -> tuple:
     """Make a health check request and return (response_time, success, error)"""
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     try:
         response = requests.get(f"{API_BASE}/health", timeout=10)
-        response_time = time.time() - start_time
+        response_time = (time.perf_counter_ns() - start_time) / 1e9
         success = response.status_code == 200
         error = None if success else f"HTTP {response.status_code}"
         return response_time, success, error
     except Exception as e:
-        response_time = time.time() - start_time
+        response_time = (time.perf_counter_ns() - start_time) / 1e9
         return response_time, False, str(e)
 
 def make_query_request() -> tuple:
     """Make a query request and return (response_time, success, error)"""
-    start_time = time.time()
+    start_time = time.perf_counter_ns()
     try:
         payload = {
             "question": "How does the application work?",
@@ -70,12 +70,12 @@ def make_query_request() -> tuple:
             "k": 3
         }
         response = requests.post(f"{API_BASE}/query", json=payload, timeout=30)
-        response_time = time.time() - start_time
+        response_time = (time.perf_counter_ns() - start_time) / 1e9
         success = response.status_code == 200
         error = None if success else f"HTTP {response.status_code}"
         return response_time, success, error
     except Exception as e:
-        response_time = time.time() - start_time
+        response_time = (time.perf_counter_ns() - start_time) / 1e9
         return response_time, False, str(e)
 
 def test_baseline_performance():
@@ -296,19 +296,19 @@ def test_api_endpoints_performance():
         metrics = PerformanceMetrics()
         
         for _ in range(10):
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             try:
                 if endpoint['method'] == 'GET':
                     response = requests.get(endpoint['url'], timeout=endpoint['timeout'])
                 else:
                     response = requests.post(endpoint['url'], timeout=endpoint['timeout'])
                 
-                response_time = time.time() - start_time
+                response_time = (time.perf_counter_ns() - start_time) / 1e9
                 success = response.status_code == 200
                 error = None if success else f"HTTP {response.status_code}"
                 
             except Exception as e:
-                response_time = time.time() - start_time
+                response_time = (time.perf_counter_ns() - start_time) / 1e9
                 success = False
                 error = str(e)
             
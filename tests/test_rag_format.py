@@ -3,22 +3,39 @@ Tests for RAG formatting and citation generation.
 """
 
 import pytest
-from pathlib import Path
-
-# Add the backend directory to the Python path
-import sys
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+from types import MappingProxyType
 
 from app.services.rag import RAGService
 from app.core.schemas import Citation
 
 
+@pytest.fixture(scope="module")
+def sample_chunks():
+    """Two retrieved auth chunks shared read-only by the prompt and citation tests."""
+    return (
+        MappingProxyType({
+            "path": "src/auth/jwt.py",
+            "start_line": 10,
+            "end_line": 25,
+            "content": "def authenticate_user(token):\n    # JWT validation logic\n    pass",
+            "score": 0.9
+        }),
+        MappingProxyType({
+            "path": "src/auth/middleware.py",
+            "start_line": 5,
+            "end_line": 15,
+            "content": "def auth_middleware(request):\n    # Auth middleware\n    pass",
+            "score": 0.8
+        })
+    )
+
+
 class TestRAGService:
     """Test cases for RAG service."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def rag_service(self):
-        """Create a RAG service instance for testing."""
+        """Create a RAG service instance shared by this module's tests."""
         return RAGService()
     
     def test_system_prompt(self, rag_service):
@@ -32,25 +49,11 @@ class TestRAGService:
         assert "line ranges" in prompt.lower()
         assert "not confident" in prompt.lower()
     
-    def test_build_rag_prompt(self, rag_service):
+    def test_build_rag_prompt(self, rag_service, sample_chunks):
         """Test building RAG prompt with retrieved chunks."""
         question = "Where is authentication implemented?"
-        retrieved_chunks = [
-            {
-                "path": "src/auth/jwt.py",
-                "start_line": 10,
-                "end_line": 25,
-                "content": "def authenticate_user(token):\n    # JWT validation logic\n    pass"
-            },
-            {
-                "path": "src/auth/middleware.py",
-                "start_line": 5,
-                "end_line": 15,
-                "content": "def auth_middleware(request):\n    # Auth middleware\n    pass"
-            }
-        ]
         
-        prompt = rag_service._build_rag_prompt(question, retrieved_chunks)
+        prompt = rag_service._build_rag_prompt(question, sample_chunks)
         
         # Check that question is included
         assert question in prompt
@@ -65,62 +68,23 @@ class TestRAGService:
         assert "Explain in 2-5 sentences" in prompt
         assert "List citations as: path:start-end" in prompt
     
-    def test_extract_citations(self, rag_service):
+    @pytest.mark.parametrize("answer,expected_count", [
+        ("Authentication is implemented in src/auth/jwt.py:10-25 and src/auth/middleware.py:5-15.", 2),
+        ("Tokens are validated in src/auth/jwt.py:10-25.", 1),
+        # No citation patterns: citations are built from every retrieved chunk
+        ("Authentication is implemented in the auth module.", 2),
+    ])
+    def test_extract_citations(self, rag_service, sample_chunks, answer, expected_count):
         """Test extracting citations from generated answer."""
-        answer = "Authentication is implemented in src/auth/jwt.py:10-25 and src/auth/middleware.py:5-15."
-        retrieved_chunks = [
-            {
-                "path": "src/auth/jwt.py",
-                "start_line": 10,
-                "end_line": 25,
-                "content": "def authenticate_user(token):\n    # JWT validation logic\n    pass",
-                "score": 0.9
-            },
-            {
-                "path": "src/auth/middleware.py",
-                "start_line": 5,
-                "end_line": 15,
-                "content": "def auth_middleware(request):\n    # Auth middleware\n    pass",
-                "score": 0.8
-            }
-        ]
+        citations = rag_service._extract_citations(answer, sample_chunks)
         
-        citations = rag_service._extract_citations(answer, retrieved_chunks)
+        assert len(citations) == expected_count
         
-        assert len(citations) == 2
-        
-        # Check first citation
-        assert citations[0].path == "src/auth/jwt.py"
-        assert citations[0].start == 10
-        assert citations[0].end == 25
-        assert citations[0].score == 0.9
-        
-        # Check second citation
-        assert citations[1].path == "src/auth/middleware.py"
-        assert citations[1].start == 5
-        assert citations[1].end == 15
-        assert citations[1].score == 0.8
-    
-    def test_extract_citations_no_patterns(self, rag_service):
-        """Test citation extraction when no patterns are found."""
-        answer = "Authentication is implemented in the auth module."
-        retrieved_chunks = [
-            {
-                "path": "src/auth/jwt.py",
-                "start_line": 10,
-                "end_line": 25,
-                "content": "def authenticate_user(token):\n    # JWT validation logic\n    pass",
-                "score": 0.9
-            }
-        ]
-        
-        citations = rag_service._extract_citations(answer, retrieved_chunks)
-        
-        # Should create citations from retrieved chunks even without patterns
-        assert len(citations) == 1
-        assert citations[0].path == "src/auth/jwt.py"
-        assert citations[0].start == 10
-        assert citations[0].end == 25
+        for citation, chunk in zip(citations, sample_chunks):
+            assert citation.path == chunk["path"]
+            assert citation.start == chunk["start_line"]
+            assert citation.end == chunk["end_line"]
+            assert citation.score == chunk["score"]
     
     def test_clean_answer(self, rag_service):
         """Test cleaning up answer text."""
@@ -225,30 +189,15 @@ class TestCitationModel:
 class TestRAGIntegration:
     """Integration tests for RAG functionality."""
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def rag_service(self):
-        """Create a RAG service instance for testing."""
+        """Create a RAG service instance shared by this module's tests."""
         return RAGService()
     
-    def test_full_rag_workflow(self, rag_service):
+    def test_full_rag_workflow(self, rag_service, sample_chunks):
         """Test a complete RAG workflow."""
         question = "Where is user authentication implemented?"
-        retrieved_chunks = [
-            {
-                "path": "src/auth/jwt.py",
-                "start_line": 10,
-                "end_line": 25,
-                "content": "def authenticate_user(token):\n    # JWT validation logic\n    return user",
-                "score": 0.9
-            },
-            {
-                "path": "src/auth/middleware.py",
-                "start_line": 5,
-                "end_line": 15,
-                "content": "def auth_middleware(request):\n    # Auth middleware\n    return request",
-                "score": 0.8
-            }
-        ]
+        retrieved_chunks = sample_chunks
         
         # Build prompt
         prompt = rag_service._build_rag_prompt(question, retrieved_chunks)
@@ -6,15 +6,33 @@ import pytest
 import tempfile
 import os
 import numpy as np
-from pathlib import Path
-
-# Add the backend directory to the Python path
-import sys
-sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
 from app.core.vector_store import VectorStore, VectorStoreManager
 from app.core.chunking import CodeChunk
 
+# Shared test embeddings (384 dimensions, matching VectorStore), built once per module
+_EMB_A = np.array([0.1, 0.2, 0.3] * 128, dtype=np.float32)
+_EMB_B = np.array([0.4, 0.5, 0.6] * 128, dtype=np.float32)
+
+# Prebuilt (n, dim) float32 matrices passed straight to add_chunks
+_EMBS_A = np.stack([_EMB_A])
+_EMBS_B = np.stack([_EMB_B])
+_EMBS_AB = np.stack([_EMB_A, _EMB_B])
+
+# Shared test chunks; tests only read them, never mutate
+_CHUNK_A = CodeChunk(path="test1.py", content="def test1(): pass", start_line=1, end_line=1,
+                     content_hash="test1.py:1", language="python")
+_CHUNK_B = CodeChunk(path="test2.py", content="def test2(): pass", start_line=1, end_line=1,
+                     content_hash="test2.py:1", language="python")
+_AUTH_CHUNKS = (
+    CodeChunk(path="auth.py", content="def authenticate(): pass", start_line=1, end_line=1,
+              content_hash="auth.py:1", language="python"),
+    CodeChunk(path="auth.py", content="def validate_token(): pass", start_line=2, end_line=2,
+              content_hash="auth.py:2", language="python"),
+    CodeChunk(path="auth.py", content="def login(): pass", start_line=3, end_line=3,
+              content_hash="auth.py:3", language="python"),
+)
+
 
 class TestVectorStore:
     """Test cases for VectorStore class."""
@@ -44,16 +62,10 @@ class TestVectorStore:
     def test_add_chunks(self, vector_store):
         """Test adding chunks to the vector store."""
         # Create test chunks
-        chunks = [
-            CodeChunk("def test1(): pass", "test1.py", 1, 1, "python"),
-            CodeChunk("def test2(): pass", "test2.py", 1, 1, "python"),
-        ]
+        chunks = [_CHUNK_A, _CHUNK_B]
         
         # Create test embeddings
-        embeddings = [
-            [0.1, 0.2, 0.3] * 512,  # 1536 dimensions
-            [0.4, 0.5, 0.6] * 512,
-        ]
+        embeddings = _EMBS_AB
         
         # Add chunks
         stored_count = vector_store.add_chunks(chunks, embeddings)
@@ -64,20 +76,14 @@ class TestVectorStore:
     def test_search(self, vector_store):
         """Test searching in the vector store."""
         # Add test data
-        chunks = [
-            CodeChunk("def test1(): pass", "test1.py", 1, 1, "python"),
-            CodeChunk("def test2(): pass", "test2.py", 1, 1, "python"),
-        ]
+        chunks = [_CHUNK_A, _CHUNK_B]
         
-        embeddings = [
-            [0.1, 0.2, 0.3] * 512,
-            [0.4, 0.5, 0.6] * 512,
-        ]
+        embeddings = _EMBS_AB
         
         vector_store.add_chunks(chunks, embeddings)
         
         # Search
-        query_embedding = [0.1, 0.2, 0.3] * 512
+        query_embedding = _EMB_A
         results = vector_store.search(query_embedding, k=2)
         
         assert len(results) == 2
@@ -86,7 +92,7 @@ class TestVectorStore:
     
     def test_search_empty_index(self, vector_store):
         """Test searching in an empty index."""
-        query_embedding = [0.1, 0.2, 0.3] * 512
+        query_embedding = _EMB_A
         results = vector_store.search(query_embedding, k=5)
         
         assert len(results) == 0
@@ -94,15 +100,9 @@ class TestVectorStore:
     def test_get_stats(self, vector_store):
         """Test getting vector store statistics."""
         # Add some test data
-        chunks = [
-            CodeChunk("def test1(): pass", "test1.py", 1, 1, "python"),
-            CodeChunk("def test2(): pass", "test2.py", 1, 1, "python"),
-        ]
+        chunks = [_CHUNK_A, _CHUNK_B]
         
-        embeddings = [
-            [0.1, 0.2, 0.3] * 512,
-            [0.4, 0.5, 0.6] * 512,
-        ]
+        embeddings = _EMBS_AB
         
         vector_store.add_chunks(chunks, embeddings)
         
@@ -118,8 +118,8 @@ class TestVectorStore:
     def test_delete_repo(self, vector_store):
         """Test deleting repository data."""
         # Add some data first
-        chunks = [CodeChunk("test content", "test.py", 1, 1, "python")]
-        embeddings = [[0.1, 0.2, 0.3] * 512]
+        chunks = [_CHUNK_A]
+        embeddings = _EMBS_A
         vector_store.add_chunks(chunks, embeddings)
         
         # Delete
@@ -134,51 +134,48 @@ class TestVectorStoreManager:
     """Test cases for VectorStoreManager class."""
     
     @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for testing."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            yield temp_dir
-    
-    @pytest.fixture
-    def manager(self, temp_dir, monkeypatch):
-        """Create a VectorStoreManager instance for testing."""
-        # Mock the settings to use temp directory
-        monkeypatch.setattr("app.core.config.settings.index_dir", temp_dir)
+    def manager(self, tmp_path, monkeypatch):
+        """A fresh manager for tests that create or delete stores."""
+        monkeypatch.setattr("app.core.config.settings.index_dir", str(tmp_path))
         
         manager = VectorStoreManager()
         yield manager
         manager.close_all()
     
+    @pytest.fixture(scope="class")
+    def populated_manager(self, tmp_path_factory):
+        """A read-only manager holding exactly two repos with one chunk each.
+        
+        Stores fix their directory when created, so the index_dir patch only
+        has to be active while they are built.
+        """
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("app.core.config.settings.index_dir", str(tmp_path_factory.mktemp("populated")))
+            
+            manager = VectorStoreManager()
+            manager.get_store("test/populated_1").add_chunks([_CHUNK_A], _EMBS_A)
+            manager.get_store("test/populated_2").add_chunks([_CHUNK_B], _EMBS_B)
+        
+        yield manager
+        manager.close_all()
+    
     def test_get_store(self, manager):
         """Test getting a vector store."""
-        store1 = manager.get_store("test/repo1")
-        store2 = manager.get_store("test/repo2")
-        store3 = manager.get_store("test/repo1")  # Should return same instance
+        store1 = manager.get_store("test/get_store_1")
+        store2 = manager.get_store("test/get_store_2")
+        store3 = manager.get_store("test/get_store_1")  # Should return same instance
         
-        assert store1.repo_id == "test/repo1"
-        assert store2.repo_id == "test/repo2"
+        assert store1.repo_id == "test/get_store_1"
+        assert store2.repo_id == "test/get_store_2"
         assert store1 is store3  # Same instance
     
-    def test_search_multiple(self, manager):
+    def test_search_multiple(self, populated_manager):
         """Test searching across multiple repositories."""
-        # Add data to multiple stores
-        store1 = manager.get_store("test/repo1")
-        store2 = manager.get_store("test/repo2")
-        
-        chunks1 = [CodeChunk("content1", "test1.py", 1, 1, "python")]
-        chunks2 = [CodeChunk("content2", "test2.py", 1, 1, "python")]
-        
-        embeddings1 = [[0.1, 0.2, 0.3] * 512]
-        embeddings2 = [[0.4, 0.5, 0.6] * 512]
-        
-        store1.add_chunks(chunks1, embeddings1)
-        store2.add_chunks(chunks2, embeddings2)
-        
         # Search across both repositories
-        query_embedding = [0.1, 0.2, 0.3] * 512
-        results = manager.search_multiple(
+        query_embedding = _EMB_A
+        results = populated_manager.search_multiple(
             query_embedding,
-            ["test/repo1", "test/repo2"],
+            ["test/populated_1", "test/populated_2"],
             k=5
         )
         
@@ -186,51 +183,40 @@ class TestVectorStoreManager:
         assert any("test1.py" in result["path"] for result in results)
         assert any("test2.py" in result["path"] for result in results)
     
-    def test_get_all_stats(self, manager):
+    def test_get_all_stats(self, populated_manager):
         """Test getting statistics for all repositories."""
-        # Add data to multiple stores
-        store1 = manager.get_store("test/repo1")
-        store2 = manager.get_store("test/repo2")
-        
-        chunks1 = [CodeChunk("content1", "test1.py", 1, 1, "python")]
-        chunks2 = [CodeChunk("content2", "test2.py", 1, 1, "python")]
-        
-        embeddings1 = [[0.1, 0.2, 0.3] * 512]
-        embeddings2 = [[0.4, 0.5, 0.6] * 512]
-        
-        store1.add_chunks(chunks1, embeddings1)
-        store2.add_chunks(chunks2, embeddings2)
-        
         # Get all stats
-        stats = manager.get_all_stats()
+        stats = populated_manager.get_all_stats()
         
+        # One chunk from a distinct file in each of the two repos
         assert stats["total_repos"] == 2
         assert stats["total_chunks"] == 2
         assert stats["total_files"] == 2
-        assert "test/repo1" in stats["repos"]
-        assert "test/repo2" in stats["repos"]
+        assert "test/populated_1" in stats["repos"]
+        assert "test/populated_2" in stats["repos"]
     
     def test_delete_repo(self, manager):
         """Test deleting a repository."""
         # Add data
-        store = manager.get_store("test/repo")
-        chunks = [CodeChunk("content", "test.py", 1, 1, "python")]
-        embeddings = [[0.1, 0.2, 0.3] * 512]
+        store = manager.get_store("test/delete_repo")
+        chunks = [_CHUNK_A]
+        embeddings = _EMBS_A
         store.add_chunks(chunks, embeddings)
         
         # Delete
-        manager.delete_repo("test/repo")
+        manager.delete_repo("test/delete_repo")
         
         # Check that store is removed
-        assert "test/repo" not in manager.stores
+        assert "test/delete_repo" not in manager.stores
     
     def test_close_all(self, manager):
         """Test closing all vector stores."""
         # Add some stores
-        manager.get_store("test/repo1")
-        manager.get_store("test/repo2")
+        manager.get_store("test/close_all_1")
+        manager.get_store("test/close_all_2")
         
-        assert len(manager.stores) == 2
+        assert "test/close_all_1" in manager.stores
+        assert "test/close_all_2" in manager.stores
         
         # Close all
         manager.close_all()
@@ -241,45 +227,43 @@ class TestVectorStoreManager:
 class TestVectorStoreIntegration:
     """Integration tests for vector store functionality."""
     
-    @pytest.fixture
+    # All chunks for the class, inserted with a single add_chunks call
+    _ALL_CHUNKS = list(_AUTH_CHUNKS)
+    
+    # Embeddings as one (n, dim) float32 matrix (simulating similarity)
+    _ALL_EMBEDDINGS = np.stack([_EMB_A, _EMB_A, _EMB_A])
+    
+    @pytest.fixture(scope="class")
     def temp_dir(self):
-        """Create a temporary directory for testing."""
+        """Create a temporary directory shared by the whole class."""
         with tempfile.TemporaryDirectory() as temp_dir:
             yield temp_dir
     
-    @pytest.fixture
-    def manager(self, temp_dir, monkeypatch):
-        """Create a VectorStoreManager instance for testing."""
-        monkeypatch.setattr("app.core.config.settings.index_dir", temp_dir)
-        
-        manager = VectorStoreManager()
-        yield manager
-        manager.close_all()
+    @pytest.fixture(scope="class")
+    def manager(self, temp_dir):
+        """Create a VectorStoreManager shared by the whole class."""
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr("app.core.config.settings.index_dir", temp_dir)
+            
+            manager = VectorStoreManager()
+            yield manager
+            manager.close_all()
     
-    def test_full_workflow(self, manager):
-        """Test a complete workflow: add chunks, search, get stats."""
-        # Create test data
-        chunks = [
-            CodeChunk("def authenticate(): pass", "auth.py", 1, 1, "python"),
-            CodeChunk("def validate_token(): pass", "auth.py", 2, 2, "python"),
-            CodeChunk("def login(): pass", "auth.py", 3, 3, "python"),
-        ]
-        
-        # Create embeddings (simulating similarity)
-        embeddings = [
-            [0.1, 0.2, 0.3] * 512,  # auth-related
-            [0.1, 0.2, 0.3] * 512,  # auth-related
-            [0.1, 0.2, 0.3] * 512,  # auth-related
-        ]
-        
-        # Add to store
+    @pytest.fixture(scope="class")
+    def auth_store(self, manager):
+        """Populate the store once; tests only query it."""
         store = manager.get_store("test/auth-repo")
-        stored_count = store.add_chunks(chunks, embeddings)
+        stored_count = store.add_chunks(self._ALL_CHUNKS, self._ALL_EMBEDDINGS)
+        return store, stored_count
+    
+    def test_full_workflow(self, auth_store):
+        """Test a complete workflow: add chunks, search, get stats."""
+        store, stored_count = auth_store
         
         assert stored_count == 3
         
         # Search for auth-related content
-        query_embedding = [0.1, 0.2, 0.3] * 512
+        query_embedding = _EMB_A
         results = store.search(query_embedding, k=3)
         
         assert len(results) == 3
@@ -287,9 +271,18 @@ class TestVectorStoreIntegration:
         
         # Get stats
         stats = store.get_stats()
-        assert stats["total_chunks"] == 3
-        assert stats["unique_files"] == 1
-        assert stats["languages"]["python"] == 3
+        assert stats["chunk_count"] == 3
+        assert stats["file_count"] == 1
+        assert stats["index_size"] == 3
+    
+    def test_search_top_k(self, auth_store):
+        """Test that search returns only the requested slice of results."""
+        store, _ = auth_store
+        
+        results = store.search(_EMB_A, k=1)
+        
+        assert len(results) == 1
+        assert "auth.py" in results[0]["path"]
 
 
 if __name__ == "__main__":
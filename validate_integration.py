@@ -6,34 +6,19 @@ Final integration validation for snippet functionality.
 import os
 import sys
 import tempfile
-import shutil
-from unittest.mock import patch, MagicMock
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from unittest.mock import patch, AsyncMock, MagicMock
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
-def test_actual_snippet_service():
-    """Test the actual snippet service implementation."""
-    print("🧪 Testing actual snippet service...")
-    
-    # Set up environment
-    temp_dir = tempfile.mkdtemp()
-    
-    try:
-        # Mock settings to avoid validation errors
-        with patch('backend.app.core.config.settings') as mock_settings:
-            mock_settings.repos_dir = temp_dir
-            mock_settings.snippet_context_lines = 6
-            mock_settings.snippet_max_chars = 1200
-            
-            from backend.app.services.snippets import extract_snippet
-            
-            # Create test repository
-            repo_dir = os.path.join(temp_dir, "integration-test")
-            os.makedirs(repo_dir, exist_ok=True)
-            
-            # Create realistic test file
-            test_content = """#!/usr/bin/env python3
+from backend.app.core import config as config_mod
+from backend.app.services.snippets import extract_snippet
+
+# Realistic source written by the snippet service check (content only, never executed)
+_AUTH_SERVICE_SRC = b"""#!/usr/bin/env python3
 \"\"\"
 Authentication service for the application.
 \"\"\"
@@ -78,9 +63,42 @@ class AuthService:
         \"\"\"Verify a password against its hash.\"\"\"
         return pwd_context.verify(plain_password, hashed_password)
 """
+
+# Fields every query response and snippet must carry
+_RESP_ATTRS = ("answer", "citations", "snippets", "latency_ms", "mode")
+_SNIP_ATTRS = ("path", "code", "window_start", "window_end")
+
+@contextmanager
+def _snippet_settings(repos_dir):
+    """Point the loaded settings at a scratch repos dir, restoring them afterwards."""
+    settings = config_mod.settings
+    saved = (settings.repos_dir, settings.snippet_context_lines, settings.snippet_max_chars)
+    
+    settings.repos_dir = repos_dir
+    settings.snippet_context_lines = 6
+    settings.snippet_max_chars = 1200
+    try:
+        yield settings
+    finally:
+        settings.repos_dir, settings.snippet_context_lines, settings.snippet_max_chars = saved
+
+def test_actual_snippet_service(tmp_path):
+    """Test the actual snippet service implementation."""
+    print("🧪 Testing actual snippet service...")
+    
+    # Set up environment
+    temp_dir = str(tmp_path)
+    os.makedirs(temp_dir, exist_ok=True)
+    
+    try:
+        # Point the shared settings at the scratch repos dir
+        with _snippet_settings(temp_dir):
+            # Create test repository
+            repo_dir = os.path.join(temp_dir, "integration-test")
+            os.makedirs(repo_dir, exist_ok=True)
             
-            with open(os.path.join(repo_dir, "auth_service.py"), "w") as f:
-                f.write(test_content)
+            # Create realistic test file
+            Path(repo_dir, "auth_service.py").write_bytes(_AUTH_SERVICE_SRC)
             
             # Test snippet extraction
             result = extract_snippet(
@@ -111,28 +129,21 @@ class AuthService:
     except Exception as e:
         print(f"   ❌ Exception in snippet service: {e}")
         return False
-    finally:
-        shutil.rmtree(temp_dir)
 
-def test_query_service_integration():
+def test_query_service_integration(tmp_path):
     """Test query service with snippet integration."""
     print("🧪 Testing query service integration...")
     
-    temp_dir = tempfile.mkdtemp()
+    temp_dir = str(tmp_path)
+    os.makedirs(temp_dir, exist_ok=True)
     
     try:
-        # Mock all dependencies
-        with patch('backend.app.core.config.settings') as mock_settings:
-            mock_settings.repos_dir = temp_dir
-            mock_settings.snippet_context_lines = 6
-            mock_settings.snippet_max_chars = 1200
-            
+        with _snippet_settings(temp_dir):
             # Create test file
             repo_dir = os.path.join(temp_dir, "query-test")
             os.makedirs(repo_dir, exist_ok=True)
             
-            with open(os.path.join(repo_dir, "test.py"), "w") as f:
-                f.write("def hello():\n    return 'world'\n\nclass Test:\n    pass\n")
+            Path(repo_dir, "test.py").write_bytes(b"def hello():\n    return 'world'\n\nclass Test:\n    pass\n")
             
             # Mock the dependencies
             with patch('backend.app.services.query.VectorStoreManager') as mock_vector, \
@@ -141,7 +152,7 @@ def test_query_service_integration():
                 
                 # Setup mocks
                 mock_embedding_instance = MagicMock()
-                mock_embedding_instance.embed_text.return_value = [0.1] * 1536
+                mock_embedding_instance.embed_text = AsyncMock(return_value=[0.1] * 1536)
                 mock_embedding.return_value = mock_embedding_instance
                 
                 mock_vector_instance = MagicMock()
@@ -163,11 +174,11 @@ def test_query_service_integration():
                 from backend.app.core.schemas import Citation
                 mock_rag_instance = MagicMock()
                 mock_rag_instance.use_mock = True
-                mock_rag_instance.generate_answer.return_value = (
+                mock_rag_instance.generate_answer = AsyncMock(return_value=(
                     "The hello function returns 'world'",
                     [Citation(path="test.py", start=1, end=2, score=0.9, content="def hello():\n    return 'world'")]
-                )
-                mock_rag_instance.validate_answer.return_value = True
+                ))
+                mock_rag_instance.validate_answer = AsyncMock(return_value=True)
                 mock_rag.return_value = mock_rag_instance
                 
                 # Test query service
@@ -187,23 +198,11 @@ def test_query_service_integration():
                 async def run_query_test():
                     response = await query_service.query(request)
                     
-                    # Verify response structure
-                    if (hasattr(response, 'answer') and
-                        hasattr(response, 'citations') and
-                        hasattr(response, 'snippets') and
-                        hasattr(response, 'latency_ms') and
-                        hasattr(response, 'mode')):
-                        
-                        # Check if snippets were extracted
-                        if len(response.snippets) > 0:
-                            snippet = response.snippets[0]
-                            if (hasattr(snippet, 'path') and
-                                hasattr(snippet, 'code') and
-                                hasattr(snippet, 'window_start') and
-                                hasattr(snippet, 'window_end')):
-                                return True
-                    
-                    return False
+                    # Verify response structure and that snippets were extracted
+                    # (model fields live in __dict__, so use plain dict lookups)
+                    return (all(map(response.__dict__.__contains__, _RESP_ATTRS)) and
+                            bool(response.snippets) and
+                            all(map(response.snippets[0].__dict__.__contains__, _SNIP_ATTRS)))
                 
                 result = asyncio.run(run_query_test())
                 
@@ -219,8 +218,6 @@ def test_query_service_integration():
         import traceback
         traceback.print_exc()
         return False
-    finally:
-        shutil.rmtree(temp_dir)
 
 def test_schema_compatibility():
     """Test schema compatibility between mock and GPT-4 modes."""
@@ -281,20 +278,15 @@ def test_schema_compatibility():
         print(f"   ❌ Exception in schema test: {e}")
         return False
 
-def test_error_handling():
+def test_error_handling(tmp_path):
     """Test error handling scenarios."""
     print("🧪 Testing error handling...")
     
-    temp_dir = tempfile.mkdtemp()
+    temp_dir = str(tmp_path)
+    os.makedirs(temp_dir, exist_ok=True)
     
     try:
-        with patch('backend.app.core.config.settings') as mock_settings:
-            mock_settings.repos_dir = temp_dir
-            mock_settings.snippet_context_lines = 6
-            mock_settings.snippet_max_chars = 1200
-            
-            from backend.app.services.snippets import extract_snippet
-            
+        with _snippet_settings(temp_dir):
             # Test 1: Non-existent file
             result1 = extract_snippet("nonexistent-repo", "missing.py", 1, 5)
             
@@ -305,8 +297,7 @@ def test_error_handling():
             repo_dir = os.path.join(temp_dir, "error-test")
             os.makedirs(repo_dir, exist_ok=True)
             
-            with open(os.path.join(repo_dir, "empty.py"), "w") as f:
-                pass  # Empty file
+            Path(repo_dir, "empty.py").touch()  # Empty file
             
             result3 = extract_snippet("error-test", "empty.py", 1, 5)
             
@@ -321,48 +312,53 @@ def test_error_handling():
     except Exception as e:
         print(f"   ❌ Exception in error handling: {e}")
         return False
-    finally:
-        shutil.rmtree(temp_dir)
 
-def test_performance_characteristics():
+def test_performance_characteristics(tmp_path):
     """Test performance characteristics."""
     print("🧪 Testing performance characteristics...")
     
-    temp_dir = tempfile.mkdtemp()
+    temp_dir = str(tmp_path)
+    os.makedirs(temp_dir, exist_ok=True)
     
     try:
-        with patch('backend.app.core.config.settings') as mock_settings:
-            mock_settings.repos_dir = temp_dir
-            mock_settings.snippet_context_lines = 6
-            mock_settings.snippet_max_chars = 1200
-            
-            from backend.app.services.snippets import extract_snippet
+        with _snippet_settings(temp_dir):
             import time
             
             # Create test repo with medium-sized file
             repo_dir = os.path.join(temp_dir, "perf-test")
             os.makedirs(repo_dir, exist_ok=True)
             
-            # Generate content (1000 lines)
-            lines = [f"def function_{i}():\n    return {i}\n" for i in range(500)]
-            content = "\n".join(lines)
+            # Generate content (1000 lines) as one bytes payload
+            content = b"\n".join(f"def function_{i}():\n    return {i}\n".encode() for i in range(500))
+            
+            # Single raw write, no text-mode encoder
+            fd = os.open(os.path.join(repo_dir, "large.py"), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, content)
+            finally:
+                os.close(fd)
+            
+            # Warm-up call so one-off costs (first open, lru caches) stay out of the timing
+            extract_snippet("perf-test", "large.py", 1, 5)
             
-            with open(os.path.join(repo_dir, "large.py"), "w") as f:
-                f.write(content)
+            # Time multiple extractions, issued concurrently like real queries
+            start_time = time.perf_counter_ns()
             
-            # Time multiple extractions
-            start_time = time.time()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(
+                    lambda i: extract_snippet("perf-test", "large.py", i*10 + 1, i*10 + 5),
+                    range(10)
+                ))
             
-            for i in range(10):
-                result = extract_snippet("perf-test", "large.py", i*10 + 1, i*10 + 5)
+            elapsed = (time.perf_counter_ns() - start_time) / 1e9
+            
+            for i, result in enumerate(results):
                 if result is None:
                     print(f"   ❌ Extraction {i} failed")
                     return False
             
-            elapsed = time.time() - start_time
-            
-            # Should be reasonably fast (less than 2 seconds for 10 extractions)
-            if elapsed < 2.0:
+            # Should be fast (less than 0.5 seconds for 10 extractions)
+            if elapsed < 0.5:
                 print(f"   ✅ Performance acceptable ({elapsed:.3f}s for 10 extractions)")
                 return True
             else:
@@ -372,33 +368,35 @@ def test_performance_characteristics():
     except Exception as e:
         print(f"   ❌ Exception in performance test: {e}")
         return False
-    finally:
-        shutil.rmtree(temp_dir)
 
 def main():
     """Run all integration validation tests."""
     print("🧪 CodeBase QA Agent - Integration Validation")
     print("=" * 60)
     
+    # (name, function, scratch subdirectory or None if the test needs none)
     tests = [
-        ("Actual Snippet Service", test_actual_snippet_service),
-        ("Query Service Integration", test_query_service_integration),
-        ("Schema Compatibility", test_schema_compatibility),
-        ("Error Handling", test_error_handling),
-        ("Performance Characteristics", test_performance_characteristics),
+        ("Actual Snippet Service", test_actual_snippet_service, "snippet-service"),
+        ("Query Service Integration", test_query_service_integration, "query-service"),
+        ("Schema Compatibility", test_schema_compatibility, None),
+        ("Error Handling", test_error_handling, "error-handling"),
+        ("Performance Characteristics", test_performance_characteristics, "performance"),
     ]
     
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        try:
-            if test_func():
-                passed += 1
-            else:
-                print(f"   ❌ {test_name} failed")
-        except Exception as e:
-            print(f"   ❌ {test_name} error: {e}")
+    # One scratch root for the whole run, removed once at the end
+    with tempfile.TemporaryDirectory() as root:
+        for test_name, test_func, tmp_name in tests:
+            args = (os.path.join(root, tmp_name),) if tmp_name else ()
+            try:
+                if test_func(*args):
+                    passed += 1
+                else:
+                    print(f"   ❌ {test_name} failed")
+            except Exception as e:
+                print(f"   ❌ {test_name} error: {e}")
     
     print(f"\n{'='*60}")
     print("📊 INTEGRATION VALIDATION RESULTS")